@@ -0,0 +1,46 @@
+"""predictions table
+
+Revision ID: 3f6a0c8e2d14
+Revises: 7d3e9a4c1b58
+Create Date: 2026-10-18 17:05:12.874120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel as sm
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a0c8e2d14'
+down_revision: Union[str, Sequence[str], None] = '7d3e9a4c1b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('predictions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.Integer(), nullable=False),
+    sa.Column('round', sa.Integer(), nullable=False),
+    sa.Column('p1', sm.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('p2', sm.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('p3', sm.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('pole', sm.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('fastest_lap', sm.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('points', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('scored_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'season', 'round', name='uq_predictions_user_id_season_round')
+    )
+    op.create_index('ix_predictions_season_round_id', 'predictions', ['season', 'round', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_predictions_season_round_id', table_name='predictions')
+    op.drop_table('predictions')
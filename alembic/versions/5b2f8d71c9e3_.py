@@ -0,0 +1,42 @@
+"""drivers championships column and history indexes
+
+Revision ID: 5b2f8d71c9e3
+Revises: e19b7c3a5d20
+Create Date: 2026-10-18 15:12:44.690381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2f8d71c9e3'
+down_revision: Union[str, Sequence[str], None] = 'e19b7c3a5d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (sort column, id) for the keyset pages of /drivers/history
+SORT_COLUMNS = ['race_wins', 'podiums', 'pole_positions', 'points', 'championships']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # drivers_championships holds the raw cell, e.g. "7 2008, 2014–2015, 2017–2020"
+    op.add_column('drivers', sa.Column(
+        'championships', sa.Integer(),
+        sa.Computed("coalesce(substring(drivers_championships from '^\\s*(\\d+)')::integer, 0)", persisted=True),
+        nullable=False
+    ))
+    for column in SORT_COLUMNS:
+        op.create_index(f'ix_drivers_{column}_id', 'drivers', [column, 'id'], unique=False)
+    op.create_index('ix_drivers_nationality_race_wins_id', 'drivers', ['nationality', 'race_wins', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_drivers_nationality_race_wins_id', table_name='drivers')
+    for column in SORT_COLUMNS:
+        op.drop_index(f'ix_drivers_{column}_id', table_name='drivers')
+    op.drop_column('drivers', 'championships')
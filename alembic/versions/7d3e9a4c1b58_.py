@@ -0,0 +1,66 @@
+"""driver stats materialized views
+
+Revision ID: 7d3e9a4c1b58
+Revises: 5b2f8d71c9e3
+Create Date: 2026-10-18 16:27:31.405762
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3e9a4c1b58'
+down_revision: Union[str, Sequence[str], None] = '5b2f8d71c9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE MATERIALIZED VIEW stats_wins_by_nationality AS
+        SELECT nationality,
+               count(*)::integer AS drivers,
+               sum(race_wins)::integer AS race_wins,
+               sum(podiums)::integer AS podiums,
+               sum(pole_positions)::integer AS pole_positions,
+               sum(championships)::integer AS championships
+        FROM drivers
+        GROUP BY nationality
+    """)
+    # Championship years come from the raw cell, e.g. "7 2008, 2014–2015, 2017–2020"
+    op.execute(r"""
+        CREATE MATERIALIZED VIEW stats_championships_by_decade AS
+        SELECT (year / 10 * 10)::integer AS decade,
+               count(*)::integer AS championships,
+               count(DISTINCT driver_id)::integer AS champions
+        FROM (
+            SELECT d.id AS driver_id, generate_series(m[1]::integer, coalesce(m[2], m[1])::integer) AS year
+            FROM drivers d, regexp_matches(d.drivers_championships, '(\d{4})(?:\s*[–-]\s*(\d{4}))?', 'g') AS m
+        ) years
+        GROUP BY 1
+    """)
+    op.execute("""
+        CREATE MATERIALIZED VIEW stats_pole_to_win AS
+        SELECT id AS driver_id, driver_name, nationality, pole_positions, race_wins,
+               round(race_wins::numeric / pole_positions, 4) AS ratio
+        FROM drivers
+        WHERE pole_positions > 0
+    """)
+    # The unique indexes are required for REFRESH ... CONCURRENTLY, the others serve
+    # the ordered /stats listings
+    op.create_index('uq_stats_wins_by_nationality_nationality', 'stats_wins_by_nationality', ['nationality'], unique=True)
+    op.create_index('ix_stats_wins_by_nationality_race_wins', 'stats_wins_by_nationality', ['race_wins', 'nationality'], unique=False)
+    op.create_index('uq_stats_championships_by_decade_decade', 'stats_championships_by_decade', ['decade'], unique=True)
+    op.create_index('uq_stats_pole_to_win_driver_id', 'stats_pole_to_win', ['driver_id'], unique=True)
+    op.create_index('ix_stats_pole_to_win_ratio', 'stats_pole_to_win', ['ratio', 'driver_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW stats_pole_to_win")
+    op.execute("DROP MATERIALIZED VIEW stats_championships_by_decade")
+    op.execute("DROP MATERIALIZED VIEW stats_wins_by_nationality")
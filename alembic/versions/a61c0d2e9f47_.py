@@ -0,0 +1,37 @@
+"""unique natural key on drivers
+
+Revision ID: a61c0d2e9f47
+Revises: 334261b2868f
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a61c0d2e9f47'
+down_revision: Union[str, Sequence[str], None] = '334261b2868f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The old row-by-row ingestion inserted a new row whenever seasons or points
+    # changed, keep only the latest one per driver before adding the constraint
+    op.execute("""
+        DELETE FROM drivers d
+        USING drivers newer
+        WHERE d.driver_name = newer.driver_name
+          AND d.nationality = newer.nationality
+          AND d.id < newer.id
+    """)
+    op.create_unique_constraint('uq_drivers_driver_name_nationality', 'drivers', ['driver_name', 'nationality'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_drivers_driver_name_nationality', 'drivers', type_='unique')
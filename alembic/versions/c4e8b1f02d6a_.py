@@ -0,0 +1,58 @@
+"""drop unused indexes on write-heavy tables
+
+Revision ID: c4e8b1f02d6a
+Revises: a61c0d2e9f47
+Create Date: 2026-10-18 14:03:52.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8b1f02d6a'
+down_revision: Union[str, Sequence[str], None] = 'a61c0d2e9f47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# No query filters or sorts on these, they only slow down scraper updates and signups
+UNUSED_INDEXES = {
+    'users': ['password'],
+    'user_details': ['user_id', 'name', 'dob', 'country'],
+    'drivers': [
+        'driver_name', 'nationality', 'seasons', 'drivers_championships', 'race_entries',
+        'race_starts', 'pole_positions', 'race_wins', 'podiums', 'fastest_laps', 'points'
+    ],
+    'current_drivers': [
+        'perm_number', 'code', 'full_name', 'dob', 'nationality', 'curr_points', 'curr_pos', 'curr_team'
+    ],
+    'current_constructors': ['name', 'nationality', 'curr_points', 'curr_pos'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, columns in UNUSED_INDEXES.items():
+        for column in columns:
+            op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
+    # Login and signup look users up by these, and they must be unique anyway
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    # /drivers/standings: WHERE active ORDER BY curr_pos
+    op.create_index('ix_current_drivers_active_curr_pos', 'current_drivers', ['curr_pos'], unique=False, postgresql_where=sa.text('active'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_current_drivers_active_curr_pos', table_name='current_drivers', postgresql_where=sa.text('active'))
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=False)
+    for table, columns in UNUSED_INDEXES.items():
+        for column in columns:
+            op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
@@ -0,0 +1,36 @@
+"""case-insensitive unique indexes on users
+
+Revision ID: e19b7c3a5d20
+Revises: c4e8b1f02d6a
+Create Date: 2026-10-18 14:41:07.532916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e19b7c3a5d20'
+down_revision: Union[str, Sequence[str], None] = 'c4e8b1f02d6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fails if two accounts differ only by case, those have to be merged by hand first
+    op.create_index('uq_users_username_lower', 'users', [sa.text('lower(username)')], unique=True)
+    op.create_index('uq_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+    # Covered by the functional indexes above
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.drop_index('uq_users_email_lower', table_name='users')
+    op.drop_index('uq_users_username_lower', table_name='users')
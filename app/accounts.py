@@ -0,0 +1,25 @@
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from app import models
+
+# Constraint name -> the field reported back in the 409
+UNIQUE_CONSTRAINTS = {
+    "uq_users_username_lower": "username",
+    "uq_users_email_lower": "email",
+}
+
+def by_login(login: str):
+    """One indexed lookup on lower(email) or lower(username), whichever the login looks like.
+
+    The SQL text only depends on the branch, so psycopg reuses the same two prepared statements.
+    """
+    if "@" in login:
+        return select(models.User).where(func.lower(models.User.email) == login.lower())
+    return select(models.User).where(func.lower(models.User.username) == login.lower())
+
+def duplicate_field(exc: IntegrityError):
+    """Which user field a unique violation was raised for, None if it was something else"""
+    diag = getattr(exc.orig, "diag", None)
+    return UNIQUE_CONSTRAINTS.get(getattr(diag, "constraint_name", None))
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+import uuid
+from redis.exceptions import RedisError
+from app import pubsub
+from app.config import settings
+from app.metrics import count_redis_call
+from app.redis_client import pipelined, redis_client
+
+logger = logging.getLogger(__name__)
+
+STANDINGS_VERSION_KEY = "standings:version"
+
+
+class VersionedCache():
+    """Serialized responses tagged with the data version they were built from.
+
+    The version lives in Redis and every bump is published on the same key, so
+    all workers drop their entries as soon as the scraper commits. While the
+    listener is disconnected the cache is bypassed, since a bump could be missed.
+    """
+
+    def __init__(self, version_key: str):
+        self.version_key = version_key
+        self.version = None
+        self._entries = {}
+        pubsub.subscribe(version_key, self._on_version)
+        pubsub.on_connect(self._sync_version)
+
+    def _on_version(self, data):
+        self.version = int(data)
+        self._entries.clear()
+
+    async def _sync_version(self, client):
+        self._on_version(await client.get(self.version_key) or 0)
+
+    async def get_or_load(self, key: str, loader) -> bytes:
+        version = self.version
+        if not pubsub.connected or version is None:
+            return await loader()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        payload = await loader()
+        # Only keep it if no bump arrived while we were querying
+        if self.version == version:
+            self._entries[key] = (version, payload)
+        return payload
+
+
+# Deletes the lock only if we still own it, so a slow refresh can't release
+# a lock that already expired and was taken by another worker
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SharedCache():
+    """Redis copy of serialized responses shared by every worker.
+
+    Entries stay fresh for `ttl` seconds and are then served stale for up to
+    `stale_ttl` more while a single worker, holding a Redis lock, recomputes
+    them in the background. Entries built from an older data version are never
+    served; requests that find no usable entry wait briefly for the lock holder
+    before falling back to the loader themselves.
+    """
+
+    def __init__(self, prefix: str, version_key: str, ttl: int, stale_ttl: int, lock_ttl: int, lock_wait: float):
+        self.prefix = prefix
+        self.version_key = version_key
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._refreshing = set()
+
+    async def _read(self, key: str):
+        entry, version = await pipelined(("hgetall", f"{self.prefix}:{key}"), ("get", self.version_key))
+        return entry, version or "0"
+
+    async def _refresh(self, key: str, version: str, token: str, loader) -> bytes:
+        try:
+            payload = await loader()
+            try:
+                count_redis_call()
+                async with redis_client.pipeline(transaction=True) as pipe:
+                    pipe.hset(f"{self.prefix}:{key}", mapping={
+                        "payload": payload,
+                        "version": version,
+                        "fresh_until": time.time() + self.ttl,
+                    })
+                    pipe.expire(f"{self.prefix}:{key}", self.ttl + self.stale_ttl)
+                    await pipe.execute()
+            except RedisError:
+                logger.warning("Could not store %s in the shared cache", key, exc_info=True)
+            return payload
+        finally:
+            try:
+                await redis_client.eval(RELEASE_LOCK_SCRIPT, 1, f"{self.prefix}:{key}:lock", token)
+            except RedisError:
+                # The lock expires on its own after lock_ttl
+                logger.warning("Could not release the shared cache lock for %s", key, exc_info=True)
+
+    def _refresh_in_background(self, key: str, version: str, token: str, loader):
+        task = asyncio.create_task(self._refresh(key, version, token, loader))
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    async def get_or_load(self, key: str, loader) -> bytes:
+        try:
+            entry, version = await self._read(key)
+        except Exception:
+            logger.warning("Shared cache unavailable, loading %s directly", key, exc_info=True)
+            return await loader()
+
+        usable = entry.get("payload") if entry.get("version") == version else None
+        if usable is not None and float(entry["fresh_until"]) > time.time():
+            return usable.encode()
+
+        token = uuid.uuid4().hex
+        try:
+            locked = await redis_client.set(f"{self.prefix}:{key}:lock", token, nx=True, ex=self.lock_ttl)
+        except RedisError:
+            logger.warning("Shared cache unavailable, loading %s directly", key, exc_info=True)
+            return await loader()
+        if locked:
+            if usable is not None:
+                self._refresh_in_background(key, version, token, loader)
+                return usable.encode()
+            return await self._refresh(key, version, token, loader)
+
+        if usable is not None:
+            return usable.encode()
+        # Another worker is recomputing, give it a moment before piling onto Postgres
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            try:
+                entry, current = await self._read(key)
+            except RedisError:
+                break
+            if entry.get("version") == current and "payload" in entry:
+                return entry["payload"].encode()
+        return await loader()
+
+
+standings_cache = VersionedCache(STANDINGS_VERSION_KEY)
+shared_standings_cache = SharedCache(
+    "standings:response",
+    STANDINGS_VERSION_KEY,
+    ttl=settings.standings_cache_ttl,
+    stale_ttl=settings.standings_stale_ttl,
+    lock_ttl=settings.standings_lock_ttl,
+    lock_wait=settings.standings_lock_wait,
+)
+
+async def cached_standings(key: str, loader) -> bytes:
+    """Local versioned cache first, then the shared Redis copy, then Postgres"""
+    return await standings_cache.get_or_load(
+        key, lambda: shared_standings_cache.get_or_load(key, loader)
+    )
+
+async def bump_standings_version():
+    """Called by the scraper after committing new standings"""
+    try:
+        version = await redis_client.incr(STANDINGS_VERSION_KEY)
+        await redis_client.publish(STANDINGS_VERSION_KEY, version)
+    except Exception:
+        logger.warning("Could not publish standings version bump", exc_info=True)
@@ -0,0 +1,60 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class ClaimsCache():
+    """Bounded LRU of validated token claims, keyed by a digest of the token.
+
+    A client reuses the same token for its whole lifetime, so the signature only
+    needs checking once. Entries are dropped at the token's `exp`, on revocation
+    or when the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        # jti -> token key, so a revocation broadcast can find the entry
+        self._by_jti = {}
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        claims, exp, jti = entry
+        if exp <= time.time():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def put(self, token: str, claims, exp: float, jti: str = None):
+        key = self._key(token)
+        self._entries[key] = (claims, exp, jti)
+        self._entries.move_to_end(key)
+        if jti is not None:
+            self._by_jti[jti] = key
+        if len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[2] is not None:
+            self._by_jti.pop(entry[2], None)
+
+    def discard(self, token: str):
+        self._drop(self._key(token))
+
+    def discard_jti(self, jti: str):
+        key = self._by_jti.get(jti)
+        if key is not None:
+            self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_jti.clear()
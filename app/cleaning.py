@@ -0,0 +1,69 @@
+import re
+import pandas as pd
+
+DRIVER_COLUMN_MAP = {
+    "Driver name": "driver_name",
+    "Nationality": "nationality",
+    "Seasons competed": "seasons",
+    "Drivers' Championships": "drivers_championships",
+    "Race entries": "race_entries",
+    "Race starts": "race_starts",
+    "Pole positions": "pole_positions",
+    "Race wins": "race_wins",
+    "Podiums": "podiums",
+    "Fastest laps": "fastest_laps",
+    "Points[a]": "points"
+}
+
+COUNT_COLUMNS = [
+    "race_entries", "race_starts", "pole_positions",
+    "race_wins", "podiums", "fastest_laps"
+]
+
+# Keeps letters (including accented ones), digits, spaces and hyphens
+NAME_JUNK_RE = re.compile(r"[^ \-\wÀ-ÖØ-öø-ÿĀ-žḀ-ỿ]", flags=re.UNICODE)
+NON_DIGIT_RE = re.compile(r"[^0-9]")
+# First number in the cell, e.g. "1,594.5 (1,787.5)" -> 1594.5 once commas are gone
+NUMBER_RE = re.compile(r"(-?\d+(?:\.\d+)?)")
+
+
+def distinct_apply(values, cleaner):
+    """Run a vectorized string cleaner over the distinct values only and broadcast back.
+
+    Stats columns repeat the same few hundred values across the whole table, so
+    this turns one regex pass per cell into one per distinct value.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    cleaned = cleaner(pd.Series(uniques, dtype="string"))
+    return cleaned.to_numpy()[codes]
+
+
+def parse_counts(values: pd.Series) -> pd.Series:
+    # Plain numbers (including floats read by read_html) parse directly, the
+    # rest have footnote markers and separators stripped
+    numeric = pd.to_numeric(values, errors="coerce")
+    digits = values.str.replace(NON_DIGIT_RE, "", regex=True)
+    digits = digits.mask(digits == "", "0").fillna("0").astype("int64")
+    return numeric.fillna(digits).astype("int64")
+
+
+def parse_points(values: pd.Series) -> pd.Series:
+    number = values.str.replace(",", "", regex=False).str.extract(NUMBER_RE, expand=False)
+    return number.astype("float64").fillna(0.0)
+
+
+def clean_names(values: pd.Series) -> pd.Series:
+    return values.str.strip().str.replace(NAME_JUNK_RE, "", regex=True)
+
+
+def clean_drivers_frame(raw: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized cleaning of the Wikipedia drivers table into `Drivers` columns"""
+    df = raw.rename(columns=lambda column: str(column).strip()).rename(columns=DRIVER_COLUMN_MAP)
+    df = df.dropna(subset=["driver_name"]).copy()
+    df["driver_name"] = distinct_apply(df["driver_name"], clean_names)
+    # All count columns share one value space, clean them in a single pass
+    counts = df[COUNT_COLUMNS].to_numpy(dtype=object)
+    df[COUNT_COLUMNS] = distinct_apply(counts.ravel(), parse_counts).reshape(counts.shape)
+    df["points"] = distinct_apply(df["points"], parse_points)
+    df["drivers_championships"] = df["drivers_championships"].astype("string").fillna("0")
+    return df
@@ -1,4 +1,4 @@
-
+from typing import Literal, Optional, Union
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,9 +10,62 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str
     access_token_expire_minutes: int
+    db_echo: Union[bool, Literal["debug"]] = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    db_slow_query_ms: float = 200
+    # psycopg prepares a statement server-side once it ran this many times, None disables
+    # (needed behind pgbouncer in transaction mode)
+    db_prepare_threshold: Optional[int] = 1
     redis_host: str
     redis_port: str
     redis_db: str
+    redis_max_connections: int = 50
+    redis_pool_timeout: float = 1.0
+    redis_socket_timeout: float = 2.0
+    redis_connect_timeout: float = 1.0
+    redis_health_check_interval: int = 30
+    hash_pool_workers: int = 2
+    hash_queue_limit: int = 32
+    standings_cache_ttl: int = 30
+    standings_stale_ttl: int = 300
+    standings_lock_ttl: int = 10
+    standings_lock_wait: float = 2.0
+    standings_refresh_interval: int = 900
+    standings_refresh_jitter: int = 60
+    leaderboard_reconcile_interval: int = 3600
+    leaderboard_reconcile_jitter: int = 300
+    leaderboard_batch_size: int = 5000
+    scoring_chunk_size: int = 10000
+    prediction_stream_maxlen: int = 1000000
+    prediction_batch_size: int = 500
+    prediction_block_ms: int = 1000
+    prediction_claim_idle_ms: int = 60000
+    prediction_max_deliveries: int = 10
+    schedule_cache_ttl: int = 300
+    schedule_refresh_interval: int = 21600
+    schedule_refresh_jitter: int = 600
+    upstream_timeout: float = 10.0
+    upstream_retries: int = 3
+    upstream_backoff: float = 0.5
+    upstream_max_concurrency: int = 4
+    snapshot_dir: str = "snapshots"
+    upstream_replay: bool = False
+    export_batch_size: int = 1000
+    search_min_similarity: float = 0.5
+    revocation_filter_capacity: int = 100000
+    revocation_filter_error_rate: float = 0.001
+    revocation_filter_rebuild: int = 3600
+    claims_cache_size: int = 10000
+    token_epoch_cache_size: int = 100000
+    # "capacity/seconds" token buckets, see app.rate_limit
+    rate_limit_login_ip: str = "20/60"
+    rate_limit_login_username: str = "5/60"
+    rate_limit_signup_ip: str = "5/600"
+    rate_limit_signup_username: str = "3/600"
+    rate_limit_local_keys: int = 100000
     class Config:
         env_file = ".env"
 
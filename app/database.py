@@ -1,7 +1,55 @@
+import logging
+import time
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.config import settings
+from app.metrics import request_stats
+from app.middleware import current_route
 postgres_url = f"postgresql+psycopg://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}"
-engine = create_engine(postgres_url, echo=True)
+engine_options = dict(
+    echo=settings.db_echo,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args={"prepare_threshold": settings.db_prepare_threshold},
+)
+# Sync engine is kept for alembic and the scraper, the routers use the async one
+engine = create_engine(postgres_url, **engine_options)
+async_engine = create_async_engine(postgres_url, **engine_options)
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    stats = request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= settings.db_slow_query_ms:
+        slow_query_logger.warning("%.1f ms [%s] %s", elapsed_ms, current_route(), statement)
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _query_started)
+    event.listen(_engine, "after_cursor_execute", _query_finished)
+
+def pool_stats() -> dict:
+    return {
+        name: {
+            "size": target.pool.size(),
+            "checked_in": target.pool.checkedin(),
+            "checked_out": target.pool.checkedout(),
+            "overflow": target.pool.overflow(),
+            "max_overflow": settings.db_max_overflow,
+        }
+        for name, target in (("sync", engine), ("async", async_engine))
+    }
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
@@ -11,4 +59,10 @@ def drop_db_and_tables():
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_async_session():
+    # expire_on_commit=False so returned models can be serialized after commit
+    # without triggering a lazy refresh outside the greenlet
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,82 @@
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from app.config import settings
+from app.utils import Hash
+
+
+class HashingPool():
+    """Runs bcrypt in worker processes so a burst of logins can't freeze the event loop"""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latencies = deque(maxlen=512)
+
+    def start(self):
+        if self._executor is None:
+            # Workers start lazily, after the event loop's threads exist. Forking a
+            # multithreaded process can deadlock on inherited locks, so they come
+            # from a clean forkserver process instead.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, fn, *args):
+        # Everything beyond the running workers is waiting in the executor queue,
+        # reject instead of letting that backlog grow without bound
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+        self.start()
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    async def bcrypt(self, password: str) -> str:
+        return await self._submit(Hash.bcrypt, password)
+
+    async def verify(self, hashed_password: str, plain_password: str) -> bool:
+        return await self._submit(Hash.verify, hashed_password, plain_password)
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+        return {
+            "workers": self.max_workers,
+            "queue_limit": self.max_queue,
+            "in_flight": min(self._pending, self.max_workers),
+            "queue_depth": max(0, self._pending - self.max_workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "latency_ms_p50": percentile(0.50),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_max": percentile(1.0),
+        }
+
+
+hash_pool = HashingPool(settings.hash_pool_workers, settings.hash_queue_limit)
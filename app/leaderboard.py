@@ -0,0 +1,110 @@
+import logging
+from sqlalchemy import select
+
+from app import models
+from app.config import settings
+from app.database import async_engine
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_KEY = "leaderboard:prediction_points"
+REBUILD_KEY = f"{LEADERBOARD_KEY}:rebuild"
+REBUILDING_KEY = f"{LEADERBOARD_KEY}:rebuilding"
+
+# Writes also go to the set being rebuilt while a reconcile runs, otherwise a
+# change committed after the reconcile's snapshot would be lost by the RENAME.
+# ARGV is score1, member1, score2, member2...
+WRITE_SCRIPT = """
+redis.call("zadd", KEYS[1], unpack(ARGV))
+if redis.call("exists", KEYS[3]) == 1 then
+    redis.call("zadd", KEYS[2], unpack(ARGV))
+end
+return #ARGV / 2
+"""
+REMOVE_SCRIPT = """
+redis.call("zrem", KEYS[1], unpack(ARGV))
+if redis.call("exists", KEYS[3]) == 1 then
+    redis.call("zrem", KEYS[2], unpack(ARGV))
+end
+return #ARGV
+"""
+
+async def set_points(points: dict):
+    """Write-through after committing {user_id: prediction_points} to Postgres.
+
+    Failures are only logged, the next reconcile puts the set back in sync.
+    """
+    if not points:
+        return
+    args = [value for user_id, score in points.items() for value in (score, user_id)]
+    try:
+        await redis_client.eval(WRITE_SCRIPT, 3, LEADERBOARD_KEY, REBUILD_KEY, REBUILDING_KEY, *args)
+    except Exception:
+        logger.warning("Could not update the leaderboard", exc_info=True)
+
+async def remove_user(user_id: int):
+    try:
+        await redis_client.eval(REMOVE_SCRIPT, 3, LEADERBOARD_KEY, REBUILD_KEY, REBUILDING_KEY, user_id)
+    except Exception:
+        logger.warning("Could not remove user %s from the leaderboard", user_id, exc_info=True)
+
+async def reconcile():
+    """Rebuild the sorted set from user_details and swap it in atomically.
+
+    The rebuilding flag is set before the snapshot is read, so every later
+    write-through also lands in the new set, and ZADD NX keeps those newer
+    scores over the snapshot's.
+    """
+    await redis_client.set(REBUILDING_KEY, 1, ex=settings.leaderboard_reconcile_interval)
+    try:
+        await redis_client.delete(REBUILD_KEY)
+        stmt = select(models.UserDetails.user_id, models.UserDetails.prediciton_points)
+        async with async_engine.connect() as conn:
+            result = await conn.stream(stmt.execution_options(yield_per=settings.leaderboard_batch_size))
+            async for rows in result.partitions():
+                await redis_client.zadd(REBUILD_KEY, {user_id: points for user_id, points in rows}, nx=True)
+        if await redis_client.exists(REBUILD_KEY):
+            await redis_client.rename(REBUILD_KEY, LEADERBOARD_KEY)
+        else:
+            await redis_client.delete(LEADERBOARD_KEY)
+    finally:
+        await redis_client.delete(REBUILDING_KEY)
+
+async def _ranked(members, start: int):
+    """Competition ranking ("1, 2, 2, 4"), users with the same points share a rank.
+
+    members are (user_id, points) pairs read from 0-based position start.
+    """
+    if not members:
+        return []
+    first_points = members[0][1]
+    # Rank of the first member = users with strictly more points + 1, O(log n)
+    rank = 1 if start == 0 else await redis_client.zcount(LEADERBOARD_KEY, f"({first_points}", "+inf") + 1
+    entries = []
+    for offset, (user_id, points) in enumerate(members):
+        if offset and points != entries[-1]["points"]:
+            rank = start + offset + 1
+        entries.append({"user_id": int(user_id), "points": int(points), "rank": rank})
+    return entries
+
+async def top(limit: int):
+    members = await redis_client.zrevrange(LEADERBOARD_KEY, 0, limit - 1, withscores=True)
+    return await _ranked(members, 0)
+
+async def rank(user_id: int):
+    """Points and rank, None if the user isn't on the board"""
+    points = await redis_client.zscore(LEADERBOARD_KEY, user_id)
+    if points is None:
+        return None
+    higher = await redis_client.zcount(LEADERBOARD_KEY, f"({points}", "+inf")
+    return {"user_id": user_id, "points": int(points), "rank": higher + 1}
+
+async def around(user_id: int, radius: int):
+    """The user with up to `radius` neighbours on each side"""
+    position = await redis_client.zrevrank(LEADERBOARD_KEY, user_id)
+    if position is None:
+        return None
+    start = max(0, position - radius)
+    members = await redis_client.zrevrange(LEADERBOARD_KEY, start, position + radius, withscores=True)
+    return await _ranked(members, start)
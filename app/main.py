@@ -1,19 +1,61 @@
+import asyncio
 from fastapi import APIRouter, FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, users, drivers, constructors
-from app.database import get_session
-from app.scraper import fetch_and_insert_new_drivers, fetch_current_season_constructors, fetch_current_season_drivers
+from app import pubsub
+from app import leaderboard
+from app.routers import auth, users, drivers, constructors, exports, predictions, stats
+from app.routers import leaderboard as leaderboard_router
+from app.config import settings
+from app.database import pool_stats
+from app.hashing import hash_pool
+from app.metrics import metrics
+from app.middleware import RequestContextMiddleware
+from app.prediction_writer import prediction_writer
+from app.redis_client import pool as redis_pool
+from app.revocation import revocation_filter
+from app.scheduler import PeriodicJob
+from app.scraper import fetch_and_insert_new_drivers, refresh_current_season, refresh_schedule
+from app.upstream import upstream
+
+standings_refresh = PeriodicJob(
+    "standings_refresh",
+    refresh_current_season,
+    interval=settings.standings_refresh_interval,
+    jitter=settings.standings_refresh_jitter,
+)
+schedule_refresh = PeriodicJob(
+    "schedule_refresh",
+    refresh_schedule,
+    interval=settings.schedule_refresh_interval,
+    jitter=settings.schedule_refresh_jitter,
+)
+leaderboard_reconcile = PeriodicJob(
+    "leaderboard_reconcile",
+    leaderboard.reconcile,
+    interval=settings.leaderboard_reconcile_interval,
+    jitter=settings.leaderboard_reconcile_jitter,
+)
 
 async def lifespan(app: FastAPI):
-    db_gen = get_session()
-    db = next(db_gen)
+    hash_pool.start()
+    # Background tasks only, startup must never wait on the network
+    tasks = [
+        asyncio.create_task(pubsub.listen()),
+        asyncio.create_task(standings_refresh.run_forever()),
+        asyncio.create_task(schedule_refresh.run_forever()),
+        asyncio.create_task(leaderboard_reconcile.run_forever()),
+        asyncio.create_task(prediction_writer.run()),
+        asyncio.create_task(revocation_filter.maintain(settings.revocation_filter_rebuild)),
+    ]
     try:
-        # Initialize F1 data
-        fetch_current_season_drivers(db)
-        fetch_current_season_constructors(db)
         yield
     finally:
-        db_gen.close()
+        for task in tasks:
+            task.cancel()
+        await upstream.aclose()
+        await redis_pool.aclose()
+        hash_pool.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -24,11 +66,44 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestContextMiddleware)
 
 @app.get("/")
 def root():
     return {"message": "F1 Platform API is running"}
 
+@app.get("/health/refresh")
+async def refresh_health():
+    """Last successful standings refresh"""
+    return await standings_refresh.status()
+
+@app.get("/health/schedule")
+async def schedule_health():
+    """Last successful race schedule refresh"""
+    return await schedule_refresh.status()
+
+@app.get("/health/leaderboard")
+async def leaderboard_health():
+    """Last successful leaderboard reconciliation"""
+    return await leaderboard_reconcile.status()
+
+@app.get("/health/predictions")
+async def prediction_writer_health():
+    """Backlog of the prediction submission stream"""
+    return await prediction_writer.stats()
+
+@app.get("/health/db")
+def db_health():
+    """Connection pool usage of both engines"""
+    return pool_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-route latency, DB query and Redis call metrics in Prometheus text format"""
+    # On the event loop like the middleware filling the dicts, a threadpool render
+    # could see them change size mid-iteration
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(
     users.router)
 app.include_router(
@@ -36,4 +111,12 @@ app.include_router(
 app.include_router(
     drivers.router)
 app.include_router(
-    constructors.router)
\ No newline at end of file
+    constructors.router)
+app.include_router(
+    exports.router)
+app.include_router(
+    stats.router)
+app.include_router(
+    leaderboard_router.router)
+app.include_router(
+    predictions.router)
@@ -0,0 +1,116 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class RequestStats():
+    __slots__ = ("db_queries", "db_seconds", "redis_calls")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.redis_calls = 0
+
+
+# Per-request counters, filled in by the SQLAlchemy and Redis hooks
+request_stats: ContextVar = ContextVar("request_stats", default=None)
+
+
+def count_redis_call():
+    stats = request_stats.get()
+    if stats is not None:
+        stats.redis_calls += 1
+
+
+class Histogram():
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf, cumulated only when rendering
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics():
+    """Per-route request metrics kept in plain dicts and rendered on scrape.
+
+    Recording a request is a few dict lookups and additions, all the
+    formatting cost is paid by /metrics.
+    """
+
+    def __init__(self):
+        self.in_flight = defaultdict(int)
+        self.latency = {}
+        self.db_queries = {}
+        self.db_seconds = defaultdict(float)
+        self.redis_calls = defaultdict(int)
+
+    def record(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route, status)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+        route_key = (method, route)
+        histogram = self.db_queries.get(route_key)
+        if histogram is None:
+            histogram = self.db_queries[route_key] = Histogram(QUERY_COUNT_BUCKETS)
+        histogram.observe(stats.db_queries)
+        self.db_seconds[route_key] += stats.db_seconds
+        self.redis_calls[route_key] += stats.redis_calls
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for method, value in self.in_flight.items():
+            lines.append(f'http_requests_in_flight{{method="{method}"}} {value}')
+        lines += [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in self.latency.items():
+            lines += histogram.render("http_request_duration_seconds", f'method="{method}",route="{route}",status="{status}"')
+        lines += [
+            "# HELP http_request_db_queries Database queries issued per request.",
+            "# TYPE http_request_db_queries histogram",
+        ]
+        for (method, route), histogram in self.db_queries.items():
+            lines += histogram.render("http_request_db_queries", f'method="{method}",route="{route}"')
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent in database queries.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route), value in self.db_seconds.items():
+            lines.append(f'http_request_db_seconds_total{{method="{method}",route="{route}"}} {value}')
+        lines += [
+            "# HELP http_request_redis_calls_total Redis round trips issued by requests.",
+            "# TYPE http_request_redis_calls_total counter",
+        ]
+        for (method, route), value in self.redis_calls.items():
+            lines.append(f'http_request_redis_calls_total{{method="{method}",route="{route}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
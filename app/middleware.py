@@ -0,0 +1,56 @@
+import time
+from contextvars import ContextVar
+from app.metrics import RequestStats, metrics, request_stats
+
+# ASGI scope of the request being served. Routing fills in scope["route"] after
+# this middleware runs, so read it lazily through current_route().
+request_scope: ContextVar = ContextVar("request_scope", default=None)
+
+
+def current_route() -> str:
+    scope = request_scope.get()
+    if scope is None:
+        return "-"
+    route = scope.get("route")
+    return route.path if route is not None else scope.get("path", "-")
+
+
+class RequestContextMiddleware():
+    """Pure ASGI middleware exposing the current request to code below the router
+    and recording per-route metrics once the response has been sent"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        stats = RequestStats()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        scope_token = request_scope.set(scope)
+        stats_token = request_stats.set(stats)
+        metrics.in_flight[method] += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight[method] -= 1
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners can't blow up cardinality
+            metrics.record(
+                method,
+                route.path if route is not None else "<unmatched>",
+                status_code,
+                time.perf_counter() - started,
+                stats,
+            )
+            request_stats.reset(stats_token)
+            request_scope.reset(scope_token)
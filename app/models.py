@@ -4,71 +4,119 @@ import datetime
 from decimal import Decimal
 from typing import Optional
 from pydantic import EmailStr, Field
-from sqlalchemy import TIMESTAMP, Boolean, Column, Integer, text
+from sqlalchemy import TIMESTAMP, Boolean, Column, Computed, Index, Integer, UniqueConstraint, text
 from sqlmodel import SQLModel, Field
 from datetime import date
 
 class User(SQLModel, table=True):
     __tablename__ = 'users'
+    __table_args__ = (
+        Index("uq_users_username_lower", text("lower(username)"), unique=True),
+        Index("uq_users_email_lower", text("lower(email)"), unique=True),
+    )
     id: int = Field(default=None, primary_key=True)
-    username: str = Field(index=True, nullable=False)
-    email: EmailStr = Field(index=True, nullable=False)
-    password: str = Field(index=True, nullable=False)
+    username: str = Field(nullable=False)
+    email: EmailStr = Field(nullable=False)
+    password: str = Field(nullable=False)
     created_at: Optional[datetime.datetime] = Field(
         sa_column=Column(TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False)
     )
 
 class Current_Drivers(SQLModel, table=True):
     __tablename__ = 'current_drivers'
+    __table_args__ = (
+        Index("ix_current_drivers_active_curr_pos", "curr_pos", postgresql_where=text("active")),
+    )
     id: str = Field(default=None, primary_key=True)
-    perm_number: int = Field(index=True, default=None, nullable=False)
-    code: str = Field(index=True, default=None, nullable=False)
-    full_name: str = Field(index=True, default=None, nullable=False)
-    dob: str = Field(index=True, default=None, nullable=False)
-    nationality: str = Field(index=True, default=None, nullable=False)
+    perm_number: int = Field(default=None, nullable=False)
+    code: str = Field(default=None, nullable=False)
+    full_name: str = Field(default=None, nullable=False)
+    dob: str = Field(default=None, nullable=False)
+    nationality: str = Field(default=None, nullable=False)
     active: bool = Field(sa_column=Column(Boolean, server_default=text("true"), nullable=False))
-    curr_points: int = Field(index=True, default=0, nullable=False)
-    curr_pos: int = Field(index=True, default=0, nullable=False)
-    curr_team: str = Field(index=True, default=None, nullable=False)
+    curr_points: int = Field(default=0, nullable=False)
+    curr_pos: int = Field(default=0, nullable=False)
+    curr_team: str = Field(default=None, nullable=False)
 
 class Current_Constructors(SQLModel, table=True):
     __tablename__ = 'current_constructors'
     id: str = Field(default=None, primary_key=True)
-    name: str = Field(index=True, default=None, nullable=False)
-    nationality: str = Field(index=True, default=None, nullable=False)
-    curr_points: int = Field(index=True, default=0, nullable=False)
-    curr_pos: int = Field(index=True, default=0, nullable=False)
+    name: str = Field(default=None, nullable=False)
+    nationality: str = Field(default=None, nullable=False)
+    curr_points: int = Field(default=0, nullable=False)
+    curr_pos: int = Field(default=0, nullable=False)
 
 class UserDetails(SQLModel, table=True):
     __tablename__ = 'user_details'
     user_id: Optional[int] = Field(
-        default=None, foreign_key="users.id", primary_key=True, nullable=False, index=True, ondelete="CASCADE"
+        default=None, foreign_key="users.id", primary_key=True, nullable=False, ondelete="CASCADE"
     )
-    name: str = Field(default=None, nullable=True, index=True)
-    dob: date = Field(default=None, nullable=True, index=True)
+    name: str = Field(default=None, nullable=True)
+    dob: date = Field(default=None, nullable=True)
     fav_driver: str = Field(
         default=None, foreign_key="current_drivers.id", nullable=True, index=True, ondelete="CASCADE"
     )
     fav_constructor: str = Field(
         default=None, foreign_key="current_constructors.id", nullable=True, index=True, ondelete="CASCADE"
     )
-    country: str = Field(default=None, index=True, nullable=True)
+    country: str = Field(default=None, nullable=True)
     prediciton_points: int = Field(
         sa_column=Column(Integer, server_default=text("0"), nullable=False)
     )
 
 class Drivers(SQLModel, table=True):
     _tablename_  = 'driver_details'
+    __table_args__ = (
+        UniqueConstraint("driver_name", "nationality", name="uq_drivers_driver_name_nationality"),
+        # Keyset pages of /drivers/history
+        Index("ix_drivers_race_wins_id", "race_wins", "id"),
+        Index("ix_drivers_podiums_id", "podiums", "id"),
+        Index("ix_drivers_pole_positions_id", "pole_positions", "id"),
+        Index("ix_drivers_points_id", "points", "id"),
+        Index("ix_drivers_championships_id", "championships", "id"),
+        Index("ix_drivers_nationality_race_wins_id", "nationality", "race_wins", "id"),
+    )
     id: int = Field(default=None, primary_key=True)
-    driver_name: str = Field(index=True, default=None, nullable=False)
-    nationality: str = Field(index=True, default=None, nullable=False)
-    seasons: str = Field(index=True, default=None, nullable=False)
-    drivers_championships: str = Field(index=True, default=None)
-    race_entries: int = Field(index=True, default=0)
-    race_starts: int = Field(index=True, default=0)
-    pole_positions: int = Field(index=True, default=0)
-    race_wins: int = Field(index=True, default=0)
-    podiums: int = Field(index=True, default=0)
-    fastest_laps: int = Field(index=True, default=0)
-    points: Decimal = Field(index=True, default=None)
+    driver_name: str = Field(default=None, nullable=False)
+    nationality: str = Field(default=None, nullable=False)
+    seasons: str = Field(default=None, nullable=False)
+    drivers_championships: str = Field(default=None)
+    # Leading count of the raw championships cell, e.g. "7 2008, 2014–2015, 2017–2020"
+    championships: Optional[int] = Field(default=None, sa_column=Column(
+        Integer, Computed(r"coalesce(substring(drivers_championships from '^\s*(\d+)')::integer, 0)", persisted=True), nullable=False
+    ))
+    race_entries: int = Field(default=0)
+    race_starts: int = Field(default=0)
+    pole_positions: int = Field(default=0)
+    race_wins: int = Field(default=0)
+    podiums: int = Field(default=0)
+    fastest_laps: int = Field(default=0)
+    points: Decimal = Field(default=None)
 
+
+class Predictions(SQLModel, table=True):
+    __tablename__ = 'predictions'
+    __table_args__ = (
+        # One prediction per user and round, resubmitting overwrites it
+        UniqueConstraint("user_id", "season", "round", name="uq_predictions_user_id_season_round"),
+        # Scoring walks one round in id order
+        Index("ix_predictions_season_round_id", "season", "round", "id"),
+    )
+    id: int = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id", nullable=False, ondelete="CASCADE")
+    season: int = Field(nullable=False)
+    round: int = Field(nullable=False)
+    # Ergast driver ids, e.g. "max_verstappen"
+    p1: str = Field(nullable=False)
+    p2: str = Field(nullable=False)
+    p3: str = Field(nullable=False)
+    pole: str = Field(nullable=False)
+    fastest_lap: str = Field(nullable=False)
+    # Points already credited to user_details, so rescoring only applies the difference
+    points: int = Field(sa_column=Column(Integer, server_default=text("0"), nullable=False))
+    scored_at: Optional[datetime.datetime] = Field(
+        default=None, sa_column=Column(TIMESTAMP(timezone=True), nullable=True)
+    )
+    updated_at: Optional[datetime.datetime] = Field(
+        sa_column=Column(TIMESTAMP(timezone=True), server_default=text("now()"), nullable=False)
+    )
@@ -1,83 +1,142 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-import redis
-import redis
-from app import schemas
+from redis.exceptions import RedisError
+from app import pubsub, schemas
+from app.claims_cache import ClaimsCache
 from app.config import settings 
+from app.redis_client import pipelined, redis_client
+from app.revocation import EPOCH_CHANNEL, REVOKED_CHANNEL, revocation_filter, token_epochs
+import logging
 import os
+import uuid
 
-redis_client = redis.Redis(
-    host=settings.redis_host,
-    port=int(settings.redis_port),
-    db=int(settings.redis_db),
-    decode_responses=True
-)
+logger = logging.getLogger(__name__)
 
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-def create_access_token(data: dict):
+claims_cache = ClaimsCache(settings.claims_cache_size)
+# Tokens revoked on other workers leave this worker's cache too
+pubsub.subscribe(REVOKED_CHANNEL, lambda redis_key: claims_cache.discard_jti(redis_key.removeprefix("revoked:")))
+
+async def current_epoch(user_id: int) -> int:
+    epoch = token_epochs.get(user_id)
+    if epoch is None:
+        try:
+            epoch = int(await redis_client.get(f"token_epoch:{user_id}") or 0)
+        except RedisError:
+            # Logins keep working without Redis, same as is_invalidated failing open.
+            # Worst case the token is issued under an old epoch and rejected later.
+            logger.warning("Could not read the token epoch of user %s", user_id, exc_info=True)
+            return token_epochs.last_known(user_id)
+        if pubsub.connected:
+            token_epochs.set(user_id, epoch)
+    return epoch
+
+async def create_access_token(data: dict):
     to_encode = data.copy()
     exp = datetime.utcnow() + timedelta(minutes = ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": exp})
+    to_encode.update({
+        "exp": exp,
+        # Revocation is keyed by this short id instead of the whole token
+        "jti": uuid.uuid4().hex,
+        "epoch": await current_epoch(to_encode["user_id"]),
+    })
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm = ALGORITHM)
     return encoded_jwt
 
-def is_blacklisted(token: str)->bool:
+async def is_invalidated(token_data: schemas.TokenData) -> bool:
+    """Whether the token was revoked on its own or by a logout-everywhere.
+
+    Both answers usually come from in-process state. Whatever has to be asked
+    of Redis (a revocation filter hit, an unknown user epoch) goes out in a
+    single pipelined round trip.
+    """
+    redis_key = f"revoked:{token_data.jti}"
+    epoch_key = f"token_epoch:{token_data.id}"
+    # Almost no token is revoked, a filter miss answers without a round trip
+    check_revoked = revocation_filter.might_contain(redis_key)
+    epoch = token_epochs.get(token_data.id)
+    if not check_revoked and epoch is not None:
+        return token_data.epoch < epoch
     try:
-        return redis_client.exists(f"blacklist:{token}") == 1
-    except:
+        if check_revoked and epoch is None:
+            revoked, stored_epoch = await pipelined(("exists", redis_key), ("get", epoch_key))
+        elif check_revoked:
+            revoked, stored_epoch = await redis_client.exists(redis_key), epoch
+        else:
+            revoked, stored_epoch = 0, await redis_client.get(epoch_key)
+    except Exception:
         return False
+    if epoch is None and pubsub.connected:
+        token_epochs.set(token_data.id, int(stored_epoch or 0))
+    return revoked == 1 or token_data.epoch < int(stored_epoch or 0)
 
-def blacklist_token(token: str):
-    """Add token to Redis blacklist with expiration matching token expiry"""
+async def blacklist_token(token: str):
+    """Revoke a single token by its jti until the token would have expired anyway"""
     try:
-        # Get token expiration time
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        exp = payload.get("exp")
-        
-        if exp:
-            # Calculate remaining seconds until expiration
-            exp_datetime = datetime.fromtimestamp(exp)
-            now = datetime.utcnow()
-            remaining_seconds = int((exp_datetime - now).total_seconds())
-            
-            if remaining_seconds > 0:
-                redis_key = f"blacklist:{token}"
-                redis_client.setex(redis_key, remaining_seconds, "blacklisted")
-                return True
+        token_data, exp = decode_access_token(token)
+        remaining_seconds = int(exp - datetime.now(timezone.utc).timestamp())
+        if remaining_seconds > 0:
+            redis_key = f"revoked:{token_data.jti}"
+            await pipelined(
+                ("setex", redis_key, remaining_seconds, 1),
+                ("publish", REVOKED_CHANNEL, redis_key),
+            )
+            revocation_filter.add(redis_key)
+            claims_cache.discard_jti(token_data.jti)
+            return True
         return False
     except Exception:
         return False
 
-def verify_access_token(token: str, credentials_exception):
+async def revoke_all_tokens(user_id: int) -> int:
+    """Log a user out everywhere: every token issued before the bump stops validating"""
+    epoch = await redis_client.incr(f"token_epoch:{user_id}")
+    token_epochs.set(user_id, epoch)
+    await redis_client.publish(EPOCH_CHANNEL, f"{user_id}:{epoch}")
+    return epoch
+
+def decode_access_token(token: str):
+    """Validated claims and expiry of a token, from the claims cache when possible"""
+    cached = claims_cache.get(token)
+    if cached is not None:
+        return cached
+    decoded_jwt = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    id = decoded_jwt.get("user_id")
+    jti = decoded_jwt.get("jti")
+    # Tokens issued before jti existed can't be revoked, make them log in again
+    if not id or not jti:
+        raise JWTError("Token is missing user_id or jti")
+    token_data = schemas.TokenData(id=id, jti=jti, epoch=decoded_jwt.get("epoch", 0))
+    claims = (token_data, decoded_jwt["exp"])
+    claims_cache.put(token, claims, decoded_jwt["exp"], jti=jti)
+    return claims
+
+async def verify_access_token(token: str, credentials_exception):
     try:
-        if is_blacklisted(token):
+        token_data, exp = decode_access_token(token)
+        if await is_invalidated(token_data):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token has been invalidated",
                 headers={"WWW-Authenticate": "Bearer"}
             )
-        decoded_jwt = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        id = decoded_jwt.get("user_id")
-        if not id:
-            raise credentials_exception
-        token_data = schemas.TokenData(id=id)
         return token_data
     except JWTError as e:
         raise credentials_exception from e
     
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    return verify_access_token(token, credentials_exception)
+    return await verify_access_token(token, credentials_exception)
     
 def get_token_from_request(request: Request) -> str:
     """Extract JWT token from Authorization header"""
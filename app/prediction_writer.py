@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from redis.exceptions import ResponseError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app import models
+from app.config import settings
+from app.database import async_engine
+from app.redis_client import dedicated_client, redis_client
+from app.schedule import race_schedule
+from app.scheduler import WORKER_ID
+from app.search import search_index
+
+logger = logging.getLogger(__name__)
+
+PREDICTION_STREAM = "predictions:submissions"
+PREDICTION_GROUP = "prediction_writers"
+# Entries that kept failing, with the original id and the last error, for replaying by hand
+PREDICTION_DEAD_LETTER_STREAM = "predictions:dead"
+PICK_FIELDS = ["p1", "p2", "p3", "pole", "fastest_lap"]
+
+async def enqueue_prediction(user_id: int, prediction) -> str:
+    """Append a validated submission to the stream, the only work done in the request"""
+    fields = {"user_id": user_id, **prediction.model_dump()}
+    return await redis_client.xadd(
+        PREDICTION_STREAM, fields, maxlen=settings.prediction_stream_maxlen, approximate=True
+    )
+
+def submitted_at(message_id: str) -> datetime:
+    """Stream ids start with the server time in ms, which orders submissions"""
+    return datetime.fromtimestamp(int(message_id.split("-")[0]) / 1000, tz=timezone.utc)
+
+def to_record(message_id: str, fields: dict) -> dict:
+    return {
+        "user_id": int(fields["user_id"]), "season": int(fields["season"]), "round": int(fields["round"]),
+        **{field: fields[field] for field in PICK_FIELDS},
+        "updated_at": submitted_at(message_id),
+    }
+
+def latest_per_round(records: list) -> list:
+    """Last write wins within a batch, stream order is submission order"""
+    latest = {}
+    for record in records:
+        latest[(record["user_id"], record["season"], record["round"])] = record
+    return list(latest.values())
+
+async def known_drivers(records: list) -> list:
+    """Drops predictions naming drivers that aren't current.
+
+    The endpoint only checks this when its search index is already loaded, so
+    it is checked again here where waiting on the DB is fine.
+    """
+    await search_index.ready()
+    valid = []
+    for record in records:
+        if all(search_index.is_current_driver(record[field]) for field in PICK_FIELDS):
+            valid.append(record)
+        else:
+            logger.warning("Dropping prediction of user %s for %s round %s, unknown drivers", record["user_id"], record["season"], record["round"])
+    return valid
+
+async def before_race_start(records: list) -> list:
+    """Drops submissions that reached Redis after their race started"""
+    valid = []
+    for record in records:
+        if await race_schedule.is_open(record["season"], record["round"], at=record["updated_at"]):
+            valid.append(record)
+        else:
+            logger.warning("Dropping prediction of user %s for %s round %s, submitted after the race start", record["user_id"], record["season"], record["round"])
+    return valid
+
+async def upsert_predictions(records: list):
+    p = models.Predictions
+    async with async_engine.begin() as conn:
+        # Accounts deleted since submitting would fail the whole batch on the FK
+        user_ids = {record["user_id"] for record in records}
+        existing = set((await conn.execute(select(models.User.id).where(models.User.id.in_(user_ids)))).scalars())
+        records = [record for record in records if record["user_id"] in existing]
+        if not records:
+            return
+        stmt = insert(p).values(records)
+        # Across batches and consumers, a submission only replaces an older one
+        await conn.execute(stmt.on_conflict_do_update(
+            constraint="uq_predictions_user_id_season_round",
+            set_={field: stmt.excluded[field] for field in [*PICK_FIELDS, "updated_at"]},
+            where=p.updated_at <= stmt.excluded.updated_at,
+        ))
+
+class PredictionWriter():
+    """Consumer group worker draining PREDICTION_STREAM into predictions.
+
+    Every app process runs one consumer, Redis splits the stream between them.
+    Messages are acked only after their batch committed, so a failed batch is
+    retried from this consumer's pending list, and messages left pending by a
+    dead consumer are claimed after prediction_claim_idle_ms. Once a batch
+    holds a message delivered max_deliveries times, its messages are retried
+    one at a time and the ones that still fail go to the dead-letter stream.
+    Entries without valid fields (e.g. trimmed by MAXLEN) are acked and skipped.
+    """
+
+    def __init__(self, batch_size: int, block_ms: int, claim_idle_ms: int, max_deliveries: int):
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.written = 0
+        self.dead_lettered = 0
+
+    async def _ensure_group(self, client):
+        try:
+            await client.xgroup_create(PREDICTION_STREAM, PREDICTION_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _read(self, client, pending: bool):
+        if pending:
+            # Our own unacked messages first, then whatever dead consumers left behind
+            response = await client.xreadgroup(PREDICTION_GROUP, WORKER_ID, {PREDICTION_STREAM: "0"}, count=self.batch_size)
+            messages = response[0][1] if response else []
+            if messages:
+                return messages
+            _, claimed, *_ = await client.xautoclaim(
+                PREDICTION_STREAM, PREDICTION_GROUP, WORKER_ID, self.claim_idle_ms, count=self.batch_size
+            )
+            return claimed
+        response = await client.xreadgroup(
+            PREDICTION_GROUP, WORKER_ID, {PREDICTION_STREAM: ">"}, count=self.batch_size, block=self.block_ms
+        )
+        return response[0][1] if response else []
+
+    async def _write(self, records: list):
+        records = await before_race_start(records)
+        await upsert_predictions(await known_drivers(latest_per_round(records)))
+
+    async def _exhausted(self, client, message_ids: list) -> set:
+        """Which of the (id-ordered) messages this consumer was given max_deliveries times"""
+        entries = await client.xpending_range(
+            PREDICTION_STREAM, PREDICTION_GROUP, min=message_ids[0], max=message_ids[-1],
+            count=len(message_ids), consumername=WORKER_ID
+        )
+        return {entry["message_id"] for entry in entries if entry["times_delivered"] >= self.max_deliveries}
+
+    async def _write_one_by_one(self, client, messages: list, exhausted: set):
+        error = None
+        for message_id, fields, record in messages:
+            try:
+                await self._write([record])
+            except Exception as e:
+                if message_id not in exhausted:
+                    # Left pending, retried after the run loop's backoff
+                    error = e
+                    continue
+                logger.error("Dead-lettering prediction %s after %s deliveries", message_id, self.max_deliveries, exc_info=True)
+                await client.xadd(
+                    PREDICTION_DEAD_LETTER_STREAM, {**fields, "message_id": message_id, "error": repr(e)},
+                    maxlen=settings.prediction_stream_maxlen, approximate=True
+                )
+                self.dead_lettered += 1
+            else:
+                self.written += 1
+            await client.xack(PREDICTION_STREAM, PREDICTION_GROUP, message_id)
+        if error is not None:
+            raise error
+
+    async def drain_once(self, client, pending: bool = False) -> int:
+        messages = await self._read(client, pending)
+        if not messages:
+            return 0
+        parsed, malformed = [], []
+        for message_id, fields in messages:
+            try:
+                parsed.append((message_id, fields, to_record(message_id, fields or {})))
+            except (KeyError, TypeError, ValueError):
+                malformed.append(message_id)
+        if malformed:
+            logger.warning("Skipping %s malformed prediction entries: %s", len(malformed), ", ".join(malformed))
+            await client.xack(PREDICTION_STREAM, PREDICTION_GROUP, *malformed)
+        if not parsed:
+            return len(messages)
+        try:
+            await self._write([record for _, _, record in parsed])
+        except Exception:
+            exhausted = await self._exhausted(client, [message_id for message_id, _, _ in parsed]) if pending else set()
+            if not exhausted:
+                raise
+            # Only the messages that fail on their own are given up on
+            await self._write_one_by_one(client, parsed, exhausted)
+            return len(messages)
+        await client.xack(PREDICTION_STREAM, PREDICTION_GROUP, *[message_id for message_id, _, _ in parsed])
+        self.written += len(parsed)
+        return len(messages)
+
+    async def run(self):
+        failures = 0
+        while True:
+            client = dedicated_client()
+            try:
+                await self._ensure_group(client)
+                # After (re)starting, finish what was read but never acked
+                while await self.drain_once(client, pending=True):
+                    pass
+                failures = 0
+                last_claim = time.monotonic()
+                while True:
+                    await self.drain_once(client)
+                    if time.monotonic() - last_claim > self.claim_idle_ms / 1000:
+                        while await self.drain_once(client, pending=True):
+                            pass
+                        last_claim = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Prediction writer failed, retrying", exc_info=True)
+                failures += 1
+            finally:
+                await client.aclose()
+            # Every retry is another delivery, back off so an outage doesn't use them up
+            await asyncio.sleep(min(30, 2 ** max(0, failures - 1)))
+
+    async def stats(self) -> dict:
+        try:
+            groups = await redis_client.xinfo_groups(PREDICTION_STREAM)
+        except Exception:
+            groups = []
+        group = next((group for group in groups if group["name"] == PREDICTION_GROUP), {})
+        return {
+            "written_by_this_worker": self.written,
+            "dead_lettered_by_this_worker": self.dead_lettered,
+            "pending": group.get("pending"),
+            "lag": group.get("lag"),
+        }
+
+prediction_writer = PredictionWriter(
+    settings.prediction_batch_size, settings.prediction_block_ms, settings.prediction_claim_idle_ms,
+    settings.prediction_max_deliveries
+)
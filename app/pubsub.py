@@ -0,0 +1,45 @@
+import asyncio
+import logging
+from app.redis_client import dedicated_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+# channel -> callbacks receiving the message payload
+handlers = {}
+# coroutines run every time the listener (re)subscribes, used to resync state
+# that may have changed while we were disconnected
+connect_hooks = []
+connected = False
+
+def subscribe(channel: str, handler):
+    handlers.setdefault(channel, []).append(handler)
+
+def on_connect(hook):
+    connect_hooks.append(hook)
+
+async def listen():
+    """Dispatch Redis pub/sub messages to the registered handlers, reconnecting on failure"""
+    global connected
+    while True:
+        # Subscriptions hold their connection forever, keep them out of the shared pool
+        client = dedicated_client()
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(*handlers)
+            for hook in connect_hooks:
+                await hook(redis_client)
+            connected = True
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                for handler in handlers.get(message["channel"], []):
+                    handler(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Redis pub/sub listener disconnected, retrying", exc_info=True)
+        finally:
+            connected = False
+            await pubsub.aclose()
+            await client.aclose()
+        await asyncio.sleep(1)
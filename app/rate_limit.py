@@ -0,0 +1,158 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Token buckets for every key in KEYS, ARGV holds capacity and refill rate (tokens
+# per ms) for each. A token is only taken when all buckets have one, so the
+# result is all-or-nothing. Returns how many ms each key has to wait, 0 = allowed.
+# TIME keeps every worker on the same clock.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call("time")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local buckets, waits, allowed = {}, {}, true
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local state = redis.call("hmget", key, "tokens", "ts")
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    buckets[i] = tokens
+    waits[i] = 0
+    if tokens < 1 then
+        waits[i] = math.ceil((1 - tokens) / rate)
+        allowed = false
+    end
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local tokens = buckets[i]
+    if allowed then
+        tokens = tokens - 1
+    end
+    redis.call("hset", key, "tokens", tostring(tokens), "ts", now)
+    redis.call("pexpire", key, math.ceil(capacity / rate))
+end
+return waits
+"""
+
+@dataclass(frozen=True)
+class Limit():
+    capacity: int
+    period: float
+
+    @classmethod
+    def parse(cls, rule: str) -> "Limit":
+        """"5/60" = bursts of 5, refilled at 5 per 60 seconds"""
+        capacity, period = rule.split("/")
+        return cls(int(capacity), float(period))
+
+    @property
+    def rate_per_ms(self) -> float:
+        return self.capacity / (self.period * 1000)
+
+class RateLimiter():
+    """Per route token buckets in Redis, keyed by client IP and by username.
+
+    A key that was refused is remembered in-process until its wait is over, so
+    a client hammering a blocked bucket is turned away without a Redis call.
+    Without Redis each worker falls back to its own buckets, which are looser
+    (one set per worker) but still cap the bcrypt work.
+    """
+
+    def __init__(self, rules: dict, max_local_keys: int):
+        self.rules = rules
+        self.max_local_keys = max_local_keys
+        # key -> time.monotonic() until which it is refused
+        self._blocked = OrderedDict()
+        # key -> (tokens, last refill), only used while Redis is unreachable
+        self._local_buckets = OrderedDict()
+
+    def _remember(self, store: OrderedDict, key: str, value):
+        store[key] = value
+        store.move_to_end(key)
+        if len(store) > self.max_local_keys:
+            store.popitem(last=False)
+
+    def _local_waits(self, keys: list, limits: list) -> list:
+        now = time.monotonic() * 1000
+        buckets, waits = [], []
+        for key, limit in zip(keys, limits):
+            tokens, ts = self._local_buckets.get(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - ts) * limit.rate_per_ms)
+            buckets.append(tokens)
+            waits.append(0 if tokens >= 1 else math.ceil((1 - tokens) / limit.rate_per_ms))
+        allowed = not any(waits)
+        for key, tokens in zip(keys, buckets):
+            self._remember(self._local_buckets, key, (tokens - 1 if allowed else tokens, now))
+        return waits
+
+    @staticmethod
+    def _reject(wait_seconds: float):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(max(1, math.ceil(wait_seconds)))},
+        )
+
+    async def check(self, route: str, **identities):
+        """Raises 429 with Retry-After when any bucket of the route is empty.
+
+        rate_limiter.check("login", ip="1.2.3.4", username="max")
+        """
+        rules = self.rules[route]
+        keys, limits = [], []
+        for scope, value in identities.items():
+            if value and scope in rules:
+                keys.append(f"ratelimit:{route}:{scope}:{value}")
+                limits.append(rules[scope])
+        if not keys:
+            return
+
+        now = time.monotonic()
+        blocked_until = max(self._blocked.get(key, 0) for key in keys)
+        if blocked_until > now:
+            self._reject(blocked_until - now)
+
+        args = [value for limit in limits for value in (limit.capacity, limit.rate_per_ms)]
+        try:
+            waits = await redis_client.eval(TOKEN_BUCKET_SCRIPT, len(keys), *keys, *args)
+        except Exception:
+            logger.warning("Rate limiter can't reach Redis, using local buckets", exc_info=True)
+            waits = self._local_waits(keys, limits)
+
+        waits = [int(wait) for wait in waits]
+        if any(waits):
+            for key, wait in zip(keys, waits):
+                if wait:
+                    self._remember(self._blocked, key, now + wait / 1000)
+            self._reject(max(waits) / 1000)
+
+def client_ip(request: Request) -> Optional[str]:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else None
+
+rate_limiter = RateLimiter(
+    {
+        "login": {
+            "ip": Limit.parse(settings.rate_limit_login_ip),
+            "username": Limit.parse(settings.rate_limit_login_username),
+        },
+        "signup": {
+            "ip": Limit.parse(settings.rate_limit_signup_ip),
+            "username": Limit.parse(settings.rate_limit_signup_username),
+        },
+    },
+    settings.rate_limit_local_keys,
+)
@@ -0,0 +1,49 @@
+import redis.asyncio as aioredis
+from app.config import settings
+from app.metrics import count_redis_call
+
+# redis-py parses replies with hiredis (in C) on its own whenever it's installed
+pool = aioredis.BlockingConnectionPool(
+    host=settings.redis_host,
+    port=int(settings.redis_port),
+    db=int(settings.redis_db),
+    decode_responses=True,
+    max_connections=settings.redis_max_connections,
+    timeout=settings.redis_pool_timeout,
+    socket_timeout=settings.redis_socket_timeout,
+    socket_connect_timeout=settings.redis_connect_timeout,
+    health_check_interval=settings.redis_health_check_interval,
+)
+
+
+class CountingRedis(aioredis.Redis):
+    """Counts round trips against the current request for /metrics"""
+
+    async def execute_command(self, *args, **options):
+        count_redis_call()
+        return await super().execute_command(*args, **options)
+
+
+redis_client = CountingRedis(connection_pool=pool)
+
+def dedicated_client() -> aioredis.Redis:
+    """Client with its own connection and no read timeout, for long-lived pub/sub"""
+    return aioredis.Redis(
+        host=settings.redis_host,
+        port=int(settings.redis_port),
+        db=int(settings.redis_db),
+        decode_responses=True,
+        socket_connect_timeout=settings.redis_connect_timeout,
+        health_check_interval=settings.redis_health_check_interval,
+    )
+
+async def pipelined(*commands):
+    """Run several commands in one round trip.
+
+    pipelined(("exists", "revoked:abc"), ("get", "token_epoch:1")) -> [0, "3"]
+    """
+    count_redis_call()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for name, *args in commands:
+            getattr(pipe, name)(*args)
+        return await pipe.execute()
@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import logging
+import math
+from collections import OrderedDict
+from app import pubsub
+from app.config import settings
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+REVOKED_CHANNEL = "revoked:added"
+EPOCH_CHANNEL = "token_epoch:bumped"
+
+
+class BloomFilter():
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions out of two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationFilter():
+    """In-process Bloom filter of revoked token keys, kept in sync over pub/sub.
+
+    A miss means the token is definitely not revoked and costs no round trip,
+    only hits need confirming against Redis. The filter is rebuilt from a SCAN
+    on every (re)connect and periodically to shed expired entries. Until it is
+    built, or while the listener is disconnected, every check goes to Redis.
+    """
+
+    def __init__(self, pattern: str, capacity: int, error_rate: float):
+        self.pattern = pattern
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = None
+        self._building = None
+        # The periodic rebuild and a reconnect can overlap, one at a time
+        self._rebuild_lock = asyncio.Lock()
+        pubsub.subscribe(REVOKED_CHANNEL, self.add)
+        pubsub.on_connect(self.rebuild)
+
+    def add(self, key: str):
+        for bloom in (self._filter, self._building):
+            if bloom is not None:
+                bloom.add(key)
+
+    def might_contain(self, key: str) -> bool:
+        if not pubsub.connected or self._filter is None:
+            return True
+        return key in self._filter
+
+    async def rebuild(self, client):
+        async with self._rebuild_lock:
+            # Keys published while we scan go into both filters, so none are lost on the swap
+            building = self._building = BloomFilter(self.capacity, self.error_rate)
+            try:
+                async for key in client.scan_iter(match=self.pattern, count=1000):
+                    building.add(key)
+                if building.count > self.capacity:
+                    logger.warning("Revocation filter over capacity (%d keys), false positives will rise", building.count)
+                self._filter = building
+            finally:
+                self._building = None
+
+    async def maintain(self, interval: int):
+        while True:
+            await asyncio.sleep(interval)
+            if not pubsub.connected:
+                continue
+            try:
+                await self.rebuild(redis_client)
+            except Exception:
+                logger.warning("Revocation filter rebuild failed", exc_info=True)
+
+
+class TokenEpochs():
+    """Local copy of per-user token epochs, kept current over pub/sub.
+
+    Logging out everywhere bumps the user's epoch, and tokens issued under an
+    older epoch stop validating. Unknown users are looked up in Redis once; the
+    copy is dropped on reconnect since bumps may have been missed meanwhile.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._epochs = OrderedDict()
+        pubsub.subscribe(EPOCH_CHANNEL, self._on_bump)
+        pubsub.on_connect(self._reset)
+
+    def _on_bump(self, data: str):
+        user_id, epoch = data.split(":")
+        self.set(int(user_id), int(epoch))
+
+    async def _reset(self, client):
+        self._epochs.clear()
+
+    def get(self, user_id: int):
+        if not pubsub.connected:
+            return None
+        epoch = self._epochs.get(user_id)
+        if epoch is not None:
+            self._epochs.move_to_end(user_id)
+        return epoch
+
+    def last_known(self, user_id: int) -> int:
+        """Whatever this worker last saw, even while disconnected, 0 if nothing"""
+        return self._epochs.get(user_id, 0)
+
+    def set(self, user_id: int, epoch: int):
+        self._epochs[user_id] = epoch
+        self._epochs.move_to_end(user_id)
+        if len(self._epochs) > self.max_size:
+            self._epochs.popitem(last=False)
+
+
+revocation_filter = RevocationFilter(
+    "revoked:*",
+    capacity=settings.revocation_filter_capacity,
+    error_rate=settings.revocation_filter_error_rate,
+)
+
+token_epochs = TokenEpochs(settings.token_epoch_cache_size)
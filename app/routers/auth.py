@@ -1,28 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app import models, schemas, utils
+from app import accounts, models, schemas
 from app import oauth2
-from app.database import get_session
+from app.database import get_async_session
+from app.hashing import hash_pool
+from app.rate_limit import client_ip, rate_limiter
 
 router = APIRouter(tags=["Authentication"])
 
 @router.post("/login", status_code=status.HTTP_202_ACCEPTED, response_model=schemas.LoginResponse)
-async def login_user(user_creds: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_session)):
-    finduser = db.exec(
-        select(models.User).where(
-            (
-                (models.User.username == user_creds.username) |
-                (models.User.email == user_creds.username)
-            )
-        )
-    ).first()
+async def login_user(request: Request, user_creds: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_session)):
+    # Before any query or bcrypt work
+    await rate_limiter.check("login", ip=client_ip(request), username=user_creds.username.lower())
+    finduser = (await db.exec(accounts.by_login(user_creds.username))).first()
     
-    if not finduser or not utils.Hash.verify(finduser.password, user_creds.password):
+    if not finduser or not await hash_pool.verify(finduser.password, user_creds.password):
         raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail="Username/Email or password incorrect")
     
-    access_token = oauth2.create_access_token(data={"user_id": finduser.id})
+    access_token = await oauth2.create_access_token(data={"user_id": finduser.id})
     
     # Return both token and user data
     return {
@@ -37,8 +35,8 @@ async def login_user(user_creds: OAuth2PasswordRequestForm = Depends(), db: Sess
     }
 
 @router.get("/me", response_model=schemas.UserOut)
-async def get_current_user_info(current_user: schemas.TokenData = Depends(oauth2.get_current_user), db: Session = Depends(get_session)):
-    user = db.exec(select(models.User).where(models.User.id == current_user.id)).first()
+async def get_current_user_info(current_user: schemas.TokenData = Depends(oauth2.get_current_user), db: AsyncSession = Depends(get_async_session)):
+    user = (await db.exec(select(models.User).where(models.User.id == current_user.id))).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
@@ -47,7 +45,7 @@ async def get_current_user_info(current_user: schemas.TokenData = Depends(oauth2
 async def logout_user(request: Request, current_user: schemas.TokenData = Depends(oauth2.get_current_user)):
     try:
         token = oauth2.get_token_from_request(request)
-        if oauth2.blacklist_token(token):
+        if await oauth2.blacklist_token(token):
             return {
                 "message": "Token has been invalidated",
                 "current_user": current_user.id
@@ -65,14 +63,33 @@ async def logout_user(request: Request, current_user: schemas.TokenData = Depend
             detail="Logout failed"
         )
 
+@router.post("/logout/all", status_code=status.HTTP_205_RESET_CONTENT)
+async def logout_everywhere(current_user: schemas.TokenData = Depends(oauth2.get_current_user)):
+    try:
+        await oauth2.revoke_all_tokens(current_user.id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Logout failed"
+        )
+    return {
+        "message": "All sessions have been invalidated",
+        "current_user": current_user.id
+    }
+
 @router.get("/health/redis")
 async def redis_health():
     """Check Redis connection health"""
     try:
-        oauth2.redis_client.ping()
+        await oauth2.redis_client.ping()
         return {"status": "healthy", "redis": "connected"}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Redis connection failed"
         )
+
+@router.get("/health/hashing")
+async def hashing_health():
+    """Password hashing pool queue depth and latency"""
+    return hash_pool.stats()
@@ -1,19 +1,31 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from pydantic import TypeAdapter
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import oauth2
 
 from .. import models, schemas, utils
-from app.database import get_session
+from app.cache import cached_standings
+from app.database import async_engine
 
 
 router = APIRouter(prefix="/constructors", tags=["Drivers"])
 
+standings_adapter = TypeAdapter(List[schemas.CurrentConstructorOut])
+
+async def load_constructor_standings() -> bytes:
+    # Opens its own session because the shared cache may run this in the
+    # background after the request that triggered it has finished
+    async with AsyncSession(async_engine, expire_on_commit=False) as db:
+        constructors = (await db.exec(select(models.Current_Constructors).order_by(
+            models.Current_Constructors.curr_pos
+        ))).all()
+        return standings_adapter.dump_json(constructors)
+
 @router.get("/standings", response_model=List[schemas.CurrentConstructorOut])
-async def get_constructor_standings(db: Session = Depends(get_session)):
-    constructors = db.exec(select(models.Current_Constructors).order_by(
-        models.Current_Constructors.curr_pos
-    )).all()
-    return constructors
\ No newline at end of file
+async def get_constructor_standings():
+    payload = await cached_standings("constructors", load_constructor_standings)
+    return Response(content=payload, media_type="application/json")
\ No newline at end of file
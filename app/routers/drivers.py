@@ -1,20 +1,89 @@
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from pydantic import TypeAdapter
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import oauth2
 
 from .. import models, schemas, utils
-from app.database import get_session
+from app.cache import cached_standings
+from app.database import async_engine, get_async_session
+from app.pagination import decode_cursor, encode_cursor, seek
+from app.search import search_index
 
 
 router = APIRouter(prefix="/drivers", tags=["Drivers"])
 
+standings_adapter = TypeAdapter(List[schemas.CurrentDriverOut])
+
+async def load_driver_standings() -> bytes:
+    # Opens its own session because the shared cache may run this in the
+    # background after the request that triggered it has finished
+    async with AsyncSession(async_engine, expire_on_commit=False) as db:
+        drivers = (await db.exec(select(models.Current_Drivers).where(
+            models.Current_Drivers.active == True
+        ).order_by(models.Current_Drivers.curr_pos))).all()
+        return standings_adapter.dump_json(drivers)
+
 @router.get("/standings", response_model=List[schemas.CurrentDriverOut])
-async def get_driver_standings(db: Session = Depends(get_session)):
-    drivers = db.exec(select(models.Current_Drivers).where(
-        models.Current_Drivers.active == True
-    ).order_by(models.Current_Drivers.curr_pos)).all()
-    return drivers
\ No newline at end of file
+async def get_driver_standings():
+    payload = await cached_standings("drivers", load_driver_standings)
+    return Response(content=payload, media_type="application/json")
+
+@router.get("/search", response_model=List[schemas.DriverSearchHit])
+async def search_drivers(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=50)):
+    """Accent-insensitive prefix/typo tolerant search over current and historical drivers"""
+    await search_index.ready()
+    return search_index.search(q, limit)
+
+# Only columns with a (column, id) index, see models.Drivers
+HistorySort = Literal["race_wins", "podiums", "pole_positions", "points", "championships"]
+HISTORY_FIELDS = list(schemas.DriverHistoryOut.model_fields)
+
+@router.get("/history", response_model=schemas.DriverHistoryPage, response_model_exclude_unset=True)
+async def get_driver_history(
+    nationality: Optional[str] = None,
+    min_wins: Optional[int] = Query(None, ge=0),
+    min_championships: Optional[int] = Query(None, ge=0),
+    sort: HistorySort = "race_wins",
+    order: Literal["asc", "desc"] = "desc",
+    fields: Optional[str] = Query(None, description="Comma separated subset of the driver fields"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_session),
+):
+    selected = HISTORY_FIELDS
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(selected) - set(HISTORY_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+
+    sort_column = getattr(models.Drivers, sort)
+    # The sort value and id are always fetched to build the next cursor
+    columns = dict.fromkeys([*selected, sort, "id"])
+    stmt = select(*[getattr(models.Drivers, column) for column in columns])
+    if nationality is not None:
+        stmt = stmt.where(models.Drivers.nationality == nationality)
+    if min_wins is not None:
+        stmt = stmt.where(models.Drivers.race_wins >= min_wins)
+    if min_championships is not None:
+        stmt = stmt.where(models.Drivers.championships >= min_championships)
+    after = decode_cursor(cursor, sort, order, sort_column) if cursor else None
+    stmt = seek(stmt, sort_column, models.Drivers.id, order, after).limit(limit + 1)
+
+    rows = [row._mapping for row in (await db.exec(stmt)).all()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, order, rows[-1][sort], rows[-1]["id"])
+    return schemas.DriverHistoryPage(
+        items=[schemas.DriverHistoryOut(**{field: row[field] for field in selected}) for row in rows],
+        next_cursor=next_cursor,
+    )
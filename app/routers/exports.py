@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+import zlib
+from typing import Literal
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app import models, oauth2, schemas
+from app.config import settings
+from app.database import async_engine
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+EXPORT_TABLES = {
+    "drivers": models.Drivers,
+    "current_drivers": models.Current_Drivers,
+    "current_constructors": models.Current_Constructors,
+}
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+async def ndjson_chunks(partitions):
+    async for rows in partitions:
+        yield "".join(json.dumps(dict(row), default=str) + "\n" for row in rows)
+
+async def csv_chunks(columns, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # Header first, so an empty table still exports one
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    async for rows in partitions:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+async def export_rows(table, format: str, compress: bool):
+    """Streams the table in primary key order through a server-side cursor.
+
+    The connection is opened here rather than taken from a dependency because
+    the body is produced after the endpoint has returned. Only one batch of
+    rows is held in memory at a time.
+    """
+    stmt = select(*table.columns).order_by(*table.primary_key.columns)
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    async with async_engine.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=settings.export_batch_size))
+        # CSV rows keep column order, NDJSON needs the names
+        if format == "csv":
+            chunks = csv_chunks(list(result.keys()), result.partitions())
+        else:
+            chunks = ndjson_chunks(result.mappings().partitions())
+        async for chunk in chunks:
+            data = chunk.encode()
+            if compressor is None:
+                yield data
+            else:
+                compressed = compressor.compress(data)
+                if compressed:
+                    yield compressed
+    if compressor is not None:
+        yield compressor.flush()
+
+@router.get("/{table}")
+async def export_table(
+    table: Literal["drivers", "current_drivers", "current_constructors"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    current_user: schemas.TokenData = Depends(oauth2.get_current_user),
+):
+    headers = {"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_rows(EXPORT_TABLES[table].__table__, format, gzip),
+        media_type=MEDIA_TYPES[format],
+        headers=headers,
+    )
@@ -0,0 +1,41 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import leaderboard, models, schemas
+from app.database import get_async_session
+
+router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
+
+async def with_usernames(db: AsyncSession, entries: list) -> list:
+    """One primary key lookup for the page of users, never a scan"""
+    ids = [entry["user_id"] for entry in entries]
+    if ids:
+        rows = (await db.exec(select(models.User.id, models.User.username).where(models.User.id.in_(ids)))).all()
+        usernames = dict(rows)
+        for entry in entries:
+            entry["username"] = usernames.get(entry["user_id"])
+    return entries
+
+@router.get("/top", response_model=List[schemas.LeaderboardEntry])
+async def leaderboard_top(limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_async_session)):
+    return await with_usernames(db, await leaderboard.top(limit))
+
+@router.get("/rank/{user_id}", response_model=schemas.LeaderboardEntry)
+async def leaderboard_rank(user_id: int, db: AsyncSession = Depends(get_async_session)):
+    entry = await leaderboard.rank(user_id)
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {user_id} is not on the leaderboard")
+    return (await with_usernames(db, [entry]))[0]
+
+@router.get("/around/{user_id}", response_model=List[schemas.LeaderboardEntry])
+async def leaderboard_around(
+    user_id: int,
+    radius: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_session),
+):
+    entries = await leaderboard.around(user_id, radius)
+    if entries is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {user_id} is not on the leaderboard")
+    return await with_usernames(db, entries)
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app import oauth2, schemas
+from app.prediction_writer import enqueue_prediction
+from app.schedule import ScheduleUnavailable, race_schedule
+from app.search import search_index
+
+router = APIRouter(prefix="/predictions", tags=["Predictions"])
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED, response_model=schemas.PredictionQueued)
+async def submit_prediction(
+    prediction: schemas.PredictionCreate,
+    current_user: schemas.TokenData = Depends(oauth2.get_current_user),
+):
+    """Validated here, written to Postgres by the prediction writer.
+
+    No DB session is used so a submission spike can't exhaust the pool, the
+    later submission for a round wins. Drivers are only checked here once the
+    search index is loaded, otherwise the writer checks them. A round closes
+    when its race starts.
+    """
+    try:
+        is_open = await race_schedule.is_open(prediction.season, prediction.round)
+    except ScheduleUnavailable:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Predictions are not accepted right now")
+    if not is_open:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Predictions for {prediction.season} round {prediction.round} are closed"
+        )
+    unknown = []
+    if search_index.loaded:
+        unknown = [
+            driver for driver in {prediction.p1, prediction.p2, prediction.p3, prediction.pole, prediction.fastest_lap}
+            if not search_index.is_current_driver(driver)
+        ]
+    else:
+        search_index.warm()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown drivers: {', '.join(sorted(unknown))}"
+        )
+    try:
+        message_id = await enqueue_prediction(current_user.id, prediction)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Predictions are not accepted right now")
+    return {"status": "queued", "id": message_id}
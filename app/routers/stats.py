@@ -0,0 +1,37 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import schemas, stats
+from app.database import get_async_session
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+# Each endpoint reads a materialized view through an index matching its ORDER BY,
+# so the cost is the rows returned, not a GROUP BY over drivers
+
+@router.get("/wins-by-nationality", response_model=List[schemas.NationalityWinsOut])
+async def wins_by_nationality(limit: int = Query(20, ge=1, le=200), db: AsyncSession = Depends(get_async_session)):
+    view = stats.wins_by_nationality
+    rows = await db.exec(select(view).order_by(view.c.race_wins.desc(), view.c.nationality.desc()).limit(limit))
+    return rows.mappings().all()
+
+@router.get("/championships-by-decade", response_model=List[schemas.DecadeChampionshipsOut])
+async def championships_by_decade(db: AsyncSession = Depends(get_async_session)):
+    view = stats.championships_by_decade
+    rows = await db.exec(select(view).order_by(view.c.decade))
+    return rows.mappings().all()
+
+@router.get("/pole-to-win", response_model=List[schemas.PoleToWinOut])
+async def pole_to_win(
+    min_poles: int = Query(5, ge=1, description="Ignore drivers with fewer pole positions"),
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_session),
+):
+    view = stats.pole_to_win
+    rows = await db.exec(
+        select(view).where(view.c.pole_positions >= min_poles)
+        .order_by(view.c.ratio.desc(), view.c.driver_id.desc()).limit(limit)
+    )
+    return rows.mappings().all()
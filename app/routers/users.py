@@ -1,89 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 
-from app import oauth2
-from .. import models, schemas, utils
-from app.database import get_session
+from app import accounts, leaderboard, oauth2
+from .. import models, schemas
+from app.database import get_async_session
+from app.hashing import hash_pool
+from app.rate_limit import client_ip, rate_limiter
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.post("/create", status_code=status.HTTP_201_CREATED, response_model=schemas.UserOut)
-async def create_user(user: schemas.UserCreate, db: Session = Depends(get_session)):
-    finduser = db.exec(select(models.User).where(
-        (models.User.email == user.email) |
-        (models.User.username == user.username)
-    )).first()
-    
-    if finduser:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT, 
-            detail=f"User with email id: {user.email} or username: {user.username} already exists"
-        )
-    
-    hashed_password = utils.Hash.bcrypt(user.password)
+async def create_user(request: Request, user: schemas.UserCreate, db: AsyncSession = Depends(get_async_session)):
+    # Before any query or bcrypt work
+    await rate_limiter.check("signup", ip=client_ip(request), username=user.username.lower())
+    hashed_password = await hash_pool.bcrypt(user.password)
     user.password = hashed_password
     
+    # User and its details row go in one transaction, duplicates are caught by the
+    # unique indexes instead of a racy pre-check
     new_user = models.User(**user.model_dump())
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    # Create user details record
-    new_user_details = models.UserDetails(user_id=new_user.id)
-    db.add(new_user_details)
-    db.commit()
+    try:
+        await db.flush()
+        db.add(models.UserDetails(user_id=new_user.id))
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        field = accounts.duplicate_field(exc)
+        if field is None:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, 
+            detail=f"User with {field}: {getattr(user, field)} already exists"
+        )
+    await db.refresh(new_user)
+    await leaderboard.set_points({new_user.id: 0})
     
     return new_user
 
 @router.get("/{user_id}/details", response_model=schemas.UserDetailsOut)
 async def get_user_details(
     user_id: int, 
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
     current_user: schemas.TokenData = Depends(oauth2.get_current_user)
 ):
     # Allow users to access their own details or admin access
     if current_user.id != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
     
-    user_details = db.exec(select(models.UserDetails).where(
+    user_details = (await db.exec(select(models.UserDetails).where(
         models.UserDetails.user_id == user_id
-    )).first()
+    ))).first()
     
     if not user_details:
         # Create default user details if not exists
         user_details = models.UserDetails(user_id=user_id)
         db.add(user_details)
-        db.commit()
-        db.refresh(user_details)
+        await db.commit()
+        await db.refresh(user_details)
     
     return user_details
 
 @router.patch("/details", response_model=schemas.UserDetailsOut)
 async def update_user_details(
     update: schemas.UserDetails, 
-    db: Session = Depends(get_session), 
+    db: AsyncSession = Depends(get_async_session), 
     current_user: schemas.TokenData = Depends(oauth2.get_current_user)
 ):
-    user_details = db.exec(select(models.UserDetails).where(
+    user_details = (await db.exec(select(models.UserDetails).where(
         models.UserDetails.user_id == current_user.id
-    )).first()
+    ))).first()
     
     if not user_details:
         # Create if doesn't exist
         user_details = models.UserDetails(user_id=current_user.id)
         db.add(user_details)
-        db.commit()
-        db.refresh(user_details)
+        await db.commit()
+        await db.refresh(user_details)
     
     update_data = update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(user_details, key, value)
     
     db.add(user_details)
-    db.commit()
-    db.refresh(user_details)
+    await db.commit()
+    await db.refresh(user_details)
     
     return user_details
 
@@ -91,19 +97,20 @@ async def update_user_details(
 @router.post("/delete", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_creds: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_session), 
+    db: AsyncSession = Depends(get_async_session), 
     current_user: schemas.TokenData = Depends(oauth2.get_current_user)
 ):
-    finduser = db.exec(select(models.User).where(
-        (models.User.email == user_creds.username) &
+    finduser = (await db.exec(select(models.User).where(
+        (func.lower(models.User.email) == user_creds.username.lower()) &
         (models.User.id == current_user.id)
-    )).first()
+    ))).first()
     
-    if not finduser or not utils.Hash.verify(finduser.password, user_creds.password):
+    if not finduser or not await hash_pool.verify(finduser.password, user_creds.password):
         raise HTTPException(
             status_code=status.HTTP_406_NOT_ACCEPTABLE, 
             detail="Incorrect email or password. Cannot delete"
         )
     
-    db.delete(finduser)
-    db.commit()
+    await db.delete(finduser)
+    await db.commit()
+    await leaderboard.remove_user(current_user.id)
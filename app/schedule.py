@@ -0,0 +1,100 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import settings
+from app.redis_client import redis_client
+from app.upstream import upstream
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_URL = "https://api.jolpi.ca/ergast/f1/{season}/races?limit=100"
+
+class ScheduleUnavailable(Exception):
+    """No copy of the season's schedule yet, a background refresh was started"""
+
+def race_start(race: dict) -> datetime:
+    """Start of an Ergast race, midnight UTC of race day when the time isn't published yet"""
+    return datetime.fromisoformat(f"{race['date']}T{race.get('time', '00:00:00Z')}".replace("Z", "+00:00"))
+
+class RaceSchedule():
+    """Race start times per season, from the Ergast schedule.
+
+    Upstream is only fetched by refresh(), which the schedule_refresh job runs
+    for the current season. Lookups read the copy it leaves in Redis, kept
+    in-process for `ttl` seconds, and keep serving the last copy they saw when
+    Redis can't be read. A season nobody fetched yet is refreshed in the
+    background and unavailable until then.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        # season -> (time.monotonic() until which it's fresh, {round: start})
+        self._seasons = {}
+        # season -> time.monotonic() of the last background refresh started
+        self._refresh_started = {}
+        self._refreshing = set()
+
+    @staticmethod
+    def _key(season: int) -> str:
+        return f"schedule:{season}"
+
+    def _keep(self, season: int, starts: dict) -> dict:
+        self._seasons[season] = (time.monotonic() + self.ttl, starts)
+        return starts
+
+    async def refresh(self, season: int) -> dict:
+        payload = await upstream.get_json(SCHEDULE_URL.format(season=season))
+        starts = {int(race["round"]): race_start(race) for race in payload["MRData"]["RaceTable"]["Races"]}
+        try:
+            # No expiry, a stale schedule beats none while upstream is down
+            await redis_client.set(self._key(season), json.dumps({round_: start.isoformat() for round_, start in starts.items()}))
+        except Exception:
+            logger.warning("Could not store the %s schedule", season, exc_info=True)
+        return self._keep(season, starts)
+
+    async def _refresh_quietly(self, season: int):
+        try:
+            await self.refresh(season)
+        except Exception:
+            logger.warning("Could not refresh the %s schedule", season, exc_info=True)
+
+    def _refresh_in_background(self, season: int):
+        # At most one attempt per season every ttl, however many lookups miss
+        started = self._refresh_started.get(season)
+        if started is not None and time.monotonic() - started < self.ttl:
+            return
+        self._refresh_started[season] = time.monotonic()
+        task = asyncio.create_task(self._refresh_quietly(season))
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    async def starts(self, season: int) -> dict:
+        entry = self._seasons.get(season)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        try:
+            cached = await redis_client.get(self._key(season))
+        except Exception:
+            logger.warning("Could not read the %s schedule", season, exc_info=True)
+            cached = None
+        if cached:
+            return self._keep(season, {int(round_): datetime.fromisoformat(start) for round_, start in json.loads(cached).items()})
+        if entry is not None:
+            return entry[1]
+        self._refresh_in_background(season)
+        raise ScheduleUnavailable(f"No schedule for {season} yet")
+
+    async def race_start(self, season: int, round_: int) -> Optional[datetime]:
+        """None if the season has no such round"""
+        return (await self.starts(season)).get(round_)
+
+    async def is_open(self, season: int, round_: int, at: datetime = None) -> bool:
+        """Predictions for a round are accepted until its race starts"""
+        start = await self.race_start(season, round_)
+        return start is not None and (at or datetime.now(timezone.utc)) < start
+
+race_schedule = RaceSchedule(settings.schedule_cache_ttl)
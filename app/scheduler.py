@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+from datetime import datetime, timezone
+from typing import Optional
+from app.cache import RELEASE_LOCK_SCRIPT
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class PeriodicJob():
+    """Runs an async callable every `interval` seconds, give or take `jitter`.
+
+    A Redis key held for roughly one interval makes sure only one worker runs
+    the job per period. A failed run gives the key up so the next worker to
+    wake up retries. The time of the last successful run is kept in Redis so
+    every worker can report it.
+    """
+
+    def __init__(self, name: str, func, interval: int, jitter: int):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.last_success = None
+        self.last_error = None
+
+    async def _claim(self) -> bool:
+        try:
+            return bool(await redis_client.set(
+                f"scheduler:{self.name}:lock", WORKER_ID,
+                nx=True, ex=max(1, self.interval - self.jitter)
+            ))
+        except Exception:
+            # Without Redis every worker refreshes, which beats nobody refreshing
+            logger.warning("Could not claim %s, running anyway", self.name, exc_info=True)
+            return True
+
+    async def _release(self):
+        try:
+            await redis_client.eval(RELEASE_LOCK_SCRIPT, 1, f"scheduler:{self.name}:lock", WORKER_ID)
+        except Exception:
+            logger.warning("Could not release %s, it expires on its own", self.name, exc_info=True)
+
+    async def run_once(self) -> Optional[bool]:
+        """True if it ran and succeeded, False if another worker has this period, None if it failed"""
+        if not await self._claim():
+            return False
+        try:
+            await self.func()
+        except Exception as e:
+            self.last_error = repr(e)
+            logger.exception("Scheduled job %s failed", self.name)
+            await self._release()
+            return None
+        self.last_success = datetime.now(timezone.utc)
+        self.last_error = None
+        try:
+            await redis_client.set(f"scheduler:{self.name}:last_success", self.last_success.isoformat())
+        except Exception:
+            pass
+        return True
+
+    async def run_forever(self):
+        # First run happens shortly after startup, never before the server is up
+        delay = random.uniform(1, 1 + self.jitter)
+        while True:
+            await asyncio.sleep(delay)
+            if await self.run_once() is None:
+                # Retry soon, like a cold start, unless another worker gets there first
+                delay = random.uniform(1, 1 + self.jitter)
+            else:
+                delay = max(1, self.interval + random.uniform(-self.jitter, self.jitter))
+
+    async def status(self) -> dict:
+        try:
+            last_success = await redis_client.get(f"scheduler:{self.name}:last_success")
+        except Exception:
+            last_success = self.last_success.isoformat() if self.last_success else None
+        return {
+            "job": self.name,
+            "interval": self.interval,
+            "last_success": last_success,
+            "last_error": self.last_error,
+        }
@@ -1,6 +1,7 @@
 from datetime import date, datetime
-from typing import Optional
-from pydantic import BaseModel, EmailStr
+from decimal import Decimal
+from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 
 
 class UserBase(BaseModel):
@@ -10,6 +11,14 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+    @field_validator("username")
+    @classmethod
+    def no_at_sign(cls, username: str):
+        # A login with "@" is looked up as an email, see accounts.by_login
+        if "@" in username:
+            raise ValueError("username can't contain @")
+        return username
+
 class UserOut(UserBase):
     id: int
     created_at: datetime
@@ -25,6 +34,8 @@ class LoginResponse(BaseModel):
 
 class TokenData(BaseModel):
     id: Optional[int] = None
+    jti: Optional[str] = None
+    epoch: int = 0
 
 class UserDetails(BaseModel):
     name: Optional[str] = None
@@ -62,4 +73,79 @@ class CurrentConstructorOut(BaseModel):
     curr_pos: int
     model_config = {
         "from_attributes": True
-    }
\ No newline at end of file
+    }
+
+class DriverSearchHit(BaseModel):
+    source: str
+    id: str
+    name: str
+    nationality: str
+    score: float
+
+class DriverHistoryOut(BaseModel):
+    # Everything optional for sparse field selection, unset fields are left out
+    id: Optional[int] = None
+    driver_name: Optional[str] = None
+    nationality: Optional[str] = None
+    seasons: Optional[str] = None
+    championships: Optional[int] = None
+    race_entries: Optional[int] = None
+    race_starts: Optional[int] = None
+    pole_positions: Optional[int] = None
+    race_wins: Optional[int] = None
+    podiums: Optional[int] = None
+    fastest_laps: Optional[int] = None
+    points: Optional[Decimal] = None
+
+class DriverHistoryPage(BaseModel):
+    items: List[DriverHistoryOut]
+    next_cursor: Optional[str] = None
+
+
+class NationalityWinsOut(BaseModel):
+    nationality: str
+    drivers: int
+    race_wins: int
+    podiums: int
+    pole_positions: int
+    championships: int
+
+class DecadeChampionshipsOut(BaseModel):
+    decade: int
+    championships: int
+    champions: int
+
+class PoleToWinOut(BaseModel):
+    driver_id: int
+    driver_name: str
+    nationality: str
+    pole_positions: int
+    race_wins: int
+    ratio: Decimal
+
+
+class LeaderboardEntry(BaseModel):
+    user_id: int
+    username: Optional[str] = None
+    points: int
+    rank: int
+
+
+class PredictionCreate(BaseModel):
+    season: int = Field(ge=1950)
+    round: int = Field(ge=1)
+    p1: str
+    p2: str
+    p3: str
+    pole: str
+    fastest_lap: str
+
+    @model_validator(mode="after")
+    def distinct_podium(self):
+        if len({self.p1, self.p2, self.p3}) != 3:
+            raise ValueError("p1, p2 and p3 must be different drivers")
+        return self
+
+class PredictionQueued(BaseModel):
+    status: str
+    id: str
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import String, bindparam, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app import leaderboard, models
+from app.config import settings
+from app.database import async_engine
+from app.schedule import race_schedule, race_start
+from app.upstream import upstream
+
+logger = logging.getLogger(__name__)
+
+RESULTS_URL = "https://api.jolpi.ca/ergast/f1/{season}/{round}/results"
+QUALIFYING_URL = "https://api.jolpi.ca/ergast/f1/{season}/{round}/qualifying"
+
+EXACT_PODIUM_POINTS = 10
+PODIUM_WRONG_PLACE_POINTS = 3
+POLE_POINTS = 5
+FASTEST_LAP_POINTS = 5
+
+@dataclass
+class RaceResult():
+    podium: tuple
+    pole: str
+    fastest_lap: str
+    # Predictions last changed at or after this don't count
+    start: datetime
+
+async def fetch_race_result(season: int, round_: int) -> RaceResult:
+    results, qualifying = await asyncio.gather(
+        upstream.get_json(RESULTS_URL.format(season=season, round=round_)),
+        upstream.get_json(QUALIFYING_URL.format(season=season, round=round_)),
+    )
+    race = results["MRData"]["RaceTable"]["Races"][0]
+    finishers = race["Results"]
+    grid = next(iter(qualifying["MRData"]["RaceTable"]["Races"]), {}).get("QualifyingResults", [])
+    by_position = {int(result["position"]): result["Driver"]["driverId"] for result in finishers}
+    # A slot missing from the official result (no fastest lap set, qualifying not
+    # published) is None and scores 0
+    fastest_lap = next((
+        result["Driver"]["driverId"] for result in finishers
+        if result.get("FastestLap", {}).get("rank") == "1"
+    ), None)
+    pole = next((result["Driver"]["driverId"] for result in grid if result["position"] == "1"), None)
+    podium = (by_position.get(1), by_position.get(2), by_position.get(3))
+    return RaceResult(podium, pole, fastest_lap, race_start(race))
+
+def result_codes(result: RaceResult):
+    """Dictionary for encoding picks plus the result itself in that encoding.
+
+    Only drivers in the official result can earn points, so they get codes
+    1..k and every other pick is 0. A slot missing from the result is 0 too,
+    which never earns points.
+    """
+    actual = [*result.podium, result.pole, result.fastest_lap]
+    vocabulary = list(dict.fromkeys(driver for driver in actual if driver is not None))
+    return vocabulary, np.array([0 if driver is None else vocabulary.index(driver) + 1 for driver in actual])
+
+def points_table(actual: np.ndarray) -> np.ndarray:
+    """Points a pick earns, indexed by [pick slot, driver code]"""
+    codes = np.arange(actual.max() + 1)
+    known = codes > 0
+    on_podium = np.isin(codes, actual[:3]) & known
+    table = np.zeros((5, len(codes)), dtype=np.int64)
+    for slot in range(3):
+        table[slot] = np.where((codes == actual[slot]) & known, EXACT_PODIUM_POINTS, on_podium * PODIUM_WRONG_PLACE_POINTS)
+    table[3] = ((codes == actual[3]) & known) * POLE_POINTS
+    table[4] = ((codes == actual[4]) & known) * FASTEST_LAP_POINTS
+    return table
+
+def score_predictions(picks: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """Points per prediction.
+
+    picks is an (n, 5) integer array of p1, p2, p3, pole, fastest_lap codes and
+    actual the official result in the same layout, see result_codes. Scoring is
+    a single gather from the points table followed by a row sum.
+    """
+    return points_table(actual)[np.arange(5), picks].sum(axis=1)
+
+# One statement per chunk: store each prediction's points and credit users with the
+# difference to what they were already given. Arrays are unnested instead of sending
+# a VALUES list so the statement has 4 parameters however big the chunk is.
+WRITE_SCORES = text("""
+WITH scores AS (
+    SELECT * FROM unnest(
+        CAST(:ids AS integer[]), CAST(:user_ids AS integer[]),
+        CAST(:points AS integer[]), CAST(:deltas AS integer[])
+    ) AS s(id, user_id, points, delta)
+), scored AS (
+    UPDATE predictions p SET points = s.points, scored_at = now()
+    FROM scores s WHERE p.id = s.id
+)
+INSERT INTO user_details (user_id, prediciton_points)
+SELECT user_id, delta FROM scores WHERE delta <> 0
+ON CONFLICT (user_id) DO UPDATE
+SET prediciton_points = user_details.prediciton_points + excluded.prediciton_points
+RETURNING user_id, prediciton_points
+""")
+
+async def score_round(season: int, round_: int, result: RaceResult) -> dict:
+    """Score the round's predictions made before the race start, in id-ordered chunks, one transaction each.
+
+    Safe to rerun (after a crash or a corrected result), only the change in
+    each prediction's points is credited.
+    """
+    p = models.Predictions
+    vocabulary, actual = result_codes(result)
+    # Picks are encoded by Postgres so every row arrives as plain integers, turning
+    # them into an array costs far less than string (object) columns
+    vocabulary_param = bindparam("vocabulary", vocabulary, type_=ARRAY(String))
+    picks = [func.coalesce(func.array_position(vocabulary_param, column), 0) for column in (p.p1, p.p2, p.p3, p.pole, p.fastest_lap)]
+    last_id, scored, users_changed = 0, 0, 0
+    while True:
+        async with async_engine.begin() as conn:
+            rows = (await conn.execute(
+                select(p.id, p.user_id, p.points, *picks)
+                .where(p.season == season, p.round == round_, p.updated_at < result.start, p.id > last_id)
+                .order_by(p.id).limit(settings.scoring_chunk_size)
+            )).all()
+            if not rows:
+                break
+            chunk = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * 8).reshape(-1, 8)
+            points = score_predictions(chunk[:, 3:], actual)
+            deltas = points - chunk[:, 2]
+            totals = dict((await conn.execute(WRITE_SCORES, {
+                "ids": chunk[:, 0].tolist(),
+                "user_ids": chunk[:, 1].tolist(),
+                "points": points.tolist(),
+                "deltas": deltas.tolist(),
+            })).all())
+        # After the commit, same as every other points change
+        await leaderboard.set_points(totals)
+        last_id = rows[-1][0]
+        scored += len(rows)
+        users_changed += len(totals)
+    logger.info("Scored %s predictions for %s round %s, %s users changed", scored, season, round_, users_changed)
+    return {"scored": scored, "users_changed": users_changed}
+
+async def score_completed_round(season: int, round_: int):
+    """Called after the standings refresh, scores the round if it has unscored predictions"""
+    p = models.Predictions
+    start = await race_schedule.race_start(season, round_)
+    if start is None:
+        return None
+    async with async_engine.connect() as conn:
+        pending = (await conn.execute(
+            select(p.id).where(p.season == season, p.round == round_, p.updated_at < start, p.scored_at.is_(None)).limit(1)
+        )).first()
+    if pending is None:
+        return None
+    return await score_round(season, round_, await fetch_race_result(season, round_))
@@ -1,103 +1,97 @@
-from decimal import Decimal
-from fastapi import Depends
-from pydantic import constr
-import requests
+import asyncio
+import logging
+from io import StringIO
 from sqlmodel import Session, select
 import pandas as pd
-import re
-from app.database import get_session
+from sqlalchemy import literal_column, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from app.cache import bump_standings_version
+from app.cleaning import clean_drivers_frame
+from app.database import engine
+from app.schedule import race_schedule
+from app.scoring import score_completed_round
+from app.search import publish_search_changes
+from app.snapshots import snapshot_store
+from app.stats import refresh_driver_stats
+from app.upstream import upstream
 import app.models as models
 
-# from app.database import get_session
+logger = logging.getLogger(__name__)
+
 current = 2025
 WEB_URL = "https://en.wikipedia.org/wiki/List_of_Formula_One_drivers"
+DRIVER_STANDINGS_URL = f"https://api.jolpi.ca/ergast/f1/{current}/driverstandings"
+CONSTRUCTOR_STANDINGS_URL = f"https://api.jolpi.ca/ergast/f1/{current}/constructorstandings"
 
-def fetch_and_insert_new_drivers(db: Session = Depends(get_session)):
-    tables = pd.read_html(WEB_URL)
-    df = tables[2]
-    df.columns = df.columns.str.strip()
-    rename_map = {
-        "Driver name": "driver_name",
-        "Nationality": "nationality",
-        "Seasons competed": "seasons",
-        "Drivers' Championships": "drivers_championships",
-        "Race entries": "race_entries",
-        "Race starts": "race_starts",
-        "Pole positions": "pole_positions",
-        "Race wins": "race_wins",
-        "Podiums": "podiums",
-        "Fastest laps": "fastest_laps",
-        "Points[a]": "points"
-    }
-    
-    df.rename(columns=rename_map, inplace=True)
+async def fetch_and_insert_new_drivers():
+    snapshot = await upstream.fetch_snapshot("wikipedia_drivers", WEB_URL)
+    if snapshot is None:
+        logger.info("Drivers page unchanged, skipping ingestion")
+        return None
+    counts = await asyncio.to_thread(insert_new_drivers_sync, snapshot.text())
+    await publish_search_changes(counts.pop("changed"))
+    snapshot_store.record(snapshot)
+    return counts
 
-    remove_alphabets = [
-        "race_entries", "race_starts", "pole_positions",
-        "race_wins", "podiums", "fastest_laps"
-    ]
+def insert_new_drivers_sync(html: str):
+    with Session(engine) as db:
+        return insert_new_drivers(db, html)
 
-    for field in remove_alphabets:
-        df[field] = df[field].astype(str).str.replace(r'[^0-9]', '', regex=True).replace('', '0')
+def insert_new_drivers(db: Session, html: str):
+    tables = pd.read_html(StringIO(html))
+    df = clean_drivers_frame(tables[2])
+    counts = upsert_drivers(db, df)
+    if counts["inserted"] or counts["updated"]:
+        refresh_driver_stats(db)
+    logger.info("Drivers inserted: %(inserted)s, updated: %(updated)s, unchanged: %(unchanged)s", counts)
+    return counts
 
-    numeric_fields = [
-        "race_entries", "race_starts", "pole_positions",
-        "race_wins", "podiums", "fastest_laps"
-    ]
-    for field in numeric_fields:
-        df[field] = df[field].astype(str).str.replace(",", "").astype(int)
-    def parse_decimal(value):
-        try:
-            return Decimal(str(value).replace(",", "").strip())
-        except:
-            return Decimal(0)
-    df["points"] = df["points"].apply(parse_decimal)
-    
-    def clean_name(name):
-        name = str(name).strip()
-        name = re.sub(r"[^ \-\wÀ-ÖØ-öø-ÿĀ-žḀ-ỿ]", "", name, flags=re.UNICODE)
-        return name
+DRIVER_KEY_COLUMNS = ["driver_name", "nationality"]
+DRIVER_STAT_COLUMNS = [
+    "seasons", "drivers_championships", "race_entries", "race_starts",
+    "pole_positions", "race_wins", "podiums", "fastest_laps", "points"
+]
+UPSERT_CHUNK_SIZE = 1000
 
-# Apply
-    df["driver_name"] = df["driver_name"].apply(clean_name)
+def upsert_drivers(db: Session, df: pd.DataFrame) -> dict:
+    """Set-based INSERT ... ON CONFLICT over the whole frame, keyed on name and nationality.
 
-    new_entries = 0
-    for _, row in df.iterrows():
-        driver = row["driver_name"]
-        seas = row["seasons"]
-        points = row["points"]
-        find_driver = db.exec(select(models.Drivers).where(
-            (
-                (models.Drivers.driver_name == driver) &
-                (models.Drivers.seasons == seas) &
-                (models.Drivers.points == points)
+    Rows whose stats didn't change are skipped by the WHERE clause, so they are
+    neither rewritten nor returned. xmax is 0 only for freshly inserted tuples,
+    which tells inserts and updates apart in the RETURNING rows. The changed
+    rows are also returned for the search index.
+    """
+    records = df[DRIVER_KEY_COLUMNS + DRIVER_STAT_COLUMNS].drop_duplicates(
+        subset=DRIVER_KEY_COLUMNS, keep="last"
+    ).to_dict("records")
+    inserted = updated = 0
+    changed = []
+    for start in range(0, len(records), UPSERT_CHUNK_SIZE):
+        stmt = insert(models.Drivers).values(records[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_drivers_driver_name_nationality",
+            set_={column: stmt.excluded[column] for column in DRIVER_STAT_COLUMNS},
+            where=tuple_(*[getattr(models.Drivers, column) for column in DRIVER_STAT_COLUMNS]).is_distinct_from(
+                tuple_(*[stmt.excluded[column] for column in DRIVER_STAT_COLUMNS])
             )
-        )).first()
-        if not find_driver:
-            db.add(models.Drivers(
-                driver_name = row["driver_name"],
-                nationality = row["nationality"],
-                seasons = row["seasons"],
-                drivers_championships = row["drivers_championships"],
-                race_entries = row["race_entries"],
-                race_starts = row["race_starts"],
-                pole_positions = row["pole_positions"],
-                race_wins = row["race_wins"],
-                podiums = row["podiums"],
-                fastest_laps = row["fastest_laps"],
-                points = row["points"]
-            ))
-            new_entries += 1
-
+        ).returning(
+            literal_column("xmax = 0"), models.Drivers.id, models.Drivers.driver_name, models.Drivers.nationality
+        )
+        for was_inserted, *row in db.exec(stmt):
+            changed.append(["history", *row])
+            if was_inserted:
+                inserted += 1
+            else:
+                updated += 1
     db.commit()
-    print("New rows: ", new_entries)
+    return {"inserted": inserted, "updated": updated, "unchanged": len(records) - inserted - updated, "changed": changed}
 
-def fetch_current_season_drivers(db: Session = Depends(get_session)):
-    url = f"https://api.jolpi.ca/ergast/f1/{current}/driverstandings"
-    res = requests.get(url)
-    current_season_drivers = res.json()["MRData"]["StandingsTable"]["StandingsLists"][0]["DriverStandings"]
+def update_current_season_drivers(db: Session, payload: dict):
+    current_season_drivers = payload["MRData"]["StandingsTable"]["StandingsLists"][0]["DriverStandings"]
     existing_drivers = {driver.id: driver for driver in db.exec(select(models.Current_Drivers)).all()}
     current_season_drivers_id = set()
+    # New or renamed drivers, for the search index
+    changed = []
     for driver_stats in current_season_drivers:
         position = driver_stats["position"]
         points = driver_stats["points"]
@@ -113,6 +107,8 @@ def fetch_current_season_drivers(db: Session = Depends(get_session)):
         if driver_id in existing_drivers:
             driver = existing_drivers[driver_id]
             driver.active = True
+            if driver.full_name != full_name:
+                changed.append(["current", driver_id, full_name, nationality])
             if driver.curr_team != constructor or driver.full_name != full_name or driver.code != code or driver.perm_number != perm_number or driver.curr_points != points or driver.curr_pos != position:
                 driver.full_name = full_name
                 driver.code = code
@@ -134,6 +130,7 @@ def fetch_current_season_drivers(db: Session = Depends(get_session)):
                 curr_team=constructor
             )
             db.add(driver)
+            changed.append(["current", driver_id, full_name, nationality])
 
     for driver in existing_drivers.values():
         if driver.id not in current_season_drivers_id and driver.active:
@@ -141,11 +138,10 @@ def fetch_current_season_drivers(db: Session = Depends(get_session)):
             db.add(driver)
         
     db.commit()
+    return changed
 
-def fetch_current_season_constructors(db: Session = Depends(get_session)):
-    url = f"https://api.jolpi.ca/ergast/f1/{current}/constructorstandings"
-    res = requests.get(url)
-    current_season_constructors = res.json()["MRData"]["StandingsTable"]["StandingsLists"][0]["ConstructorStandings"]
+def update_current_season_constructors(db: Session, payload: dict):
+    current_season_constructors = payload["MRData"]["StandingsTable"]["StandingsLists"][0]["ConstructorStandings"]
     existing_constructors = {constructor.id: constructor for constructor in db.exec(select(models.Current_Constructors)).all()}
     current_season_constructors_id = set()
     for constructor_stats in current_season_constructors:
@@ -172,4 +168,47 @@ def fetch_current_season_constructors(db: Session = Depends(get_session)):
             )
             db.add(constructor)
         
-    db.commit()
\ No newline at end of file
+    db.commit()
+
+def update_current_season_sync(drivers_payload: dict = None, constructors_payload: dict = None):
+    changed = []
+    with Session(engine) as db:
+        if drivers_payload is not None:
+            changed = update_current_season_drivers(db, drivers_payload)
+        if constructors_payload is not None:
+            update_current_season_constructors(db, constructors_payload)
+    return changed
+
+async def refresh_current_season():
+    # Both standings are fetched concurrently, so a refresh costs the slowest call
+    drivers, constructors = await asyncio.gather(
+        upstream.fetch_snapshot("driver_standings", DRIVER_STANDINGS_URL),
+        upstream.fetch_snapshot("constructor_standings", CONSTRUCTOR_STANDINGS_URL),
+    )
+    if drivers is None and constructors is None:
+        return
+    # DB work is still sync, keep it off the event loop
+    changed = await asyncio.to_thread(
+        update_current_season_sync,
+        drivers.json() if drivers else None,
+        constructors.json() if constructors else None,
+    )
+    await bump_standings_version()
+    await publish_search_changes(changed)
+    if constructors is not None:
+        snapshot_store.record(constructors)
+    if drivers is not None:
+        # Standings move on once a race is classified, which is when it can be scored.
+        # The driver snapshot is only recorded once that worked, so after a scoring
+        # failure the next refresh sees the standings as new and scores again.
+        try:
+            completed_round = int(drivers.json()["MRData"]["StandingsTable"]["StandingsLists"][0]["round"])
+            await score_completed_round(current, completed_round)
+        except Exception:
+            logger.exception("Scoring the completed round failed, retrying next refresh")
+            return
+        snapshot_store.record(drivers)
+
+async def refresh_schedule():
+    # Keeps the Redis copy prediction lookups read current, they never go upstream
+    await race_schedule.refresh(current)
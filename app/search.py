@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from app import models, pubsub
+from app.config import settings
+from app.database import async_engine
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CHANNEL = "search:drivers"
+
+# Letters NFKD doesn't decompose into base + accent
+FOLD_TABLE = str.maketrans({"ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "æ": "ae", "œ": "oe", "ı": "i"})
+
+def fold(text: str) -> str:
+    """Lowercase, strip accents and collapse everything but letters/digits to single spaces"""
+    text = unicodedata.normalize("NFKD", text.casefold().translate(FOLD_TABLE))
+    text = "".join(ch if ch.isalnum() else " " for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.split())
+
+def trigrams(folded: str) -> set:
+    """pg_trgm style: each word padded with two spaces in front and one behind"""
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+@dataclass
+class Entry():
+    source: str
+    id: str
+    name: str
+    nationality: str
+    folded: str
+    grams: set
+
+class DriverSearchIndex():
+    """Prefix and trigram index over Drivers.driver_name and Current_Drivers.full_name.
+
+    Loaded from the DB once, then kept current by the changes the scraper
+    publishes on SEARCH_CHANNEL after each ingestion commit. A full reload
+    is started in the background whenever pub/sub reconnects, in case updates
+    were missed.
+    """
+
+    def __init__(self, min_similarity: float):
+        self.min_similarity = min_similarity
+        self.entries = {}
+        self.prefixes = {}
+        self.grams = {}
+        self.loaded = False
+        self._lock = asyncio.Lock()
+        self._warming = None
+        pubsub.subscribe(SEARCH_CHANNEL, self._on_changes)
+        pubsub.on_connect(self._reload)
+
+    def add(self, source: str, id, name: str, nationality: str):
+        key = (source, str(id))
+        self.remove(key)
+        folded = fold(name)
+        entry = Entry(source, str(id), name, nationality, folded, trigrams(folded))
+        self.entries[key] = entry
+        for token in folded.split():
+            for end in range(1, len(token) + 1):
+                self.prefixes.setdefault(token[:end], set()).add(key)
+        for gram in entry.grams:
+            self.grams.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for token in entry.folded.split():
+            for end in range(1, len(token) + 1):
+                self.prefixes[token[:end]].discard(key)
+        for gram in entry.grams:
+            self.grams[gram].discard(key)
+
+    def search(self, query: str, limit: int = 10):
+        folded = fold(query)
+        if not folded:
+            return []
+        scores = {}
+        # Every query word must prefix some word of the name, "lew ham" finds Lewis Hamilton
+        prefix_hits = None
+        for token in folded.split():
+            hits = self.prefixes.get(token, set())
+            prefix_hits = hits if prefix_hits is None else prefix_hits & hits
+        for key in prefix_hits:
+            scores[key] = 2.0 if self.entries[key].folded.startswith(folded) else 1.0
+        # Trigram word similarity (share of the query's trigrams found in the name,
+        # like pg_trgm's word_similarity) catches typos, "hamliton" still finds Hamilton
+        query_grams = trigrams(folded)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.grams.get(gram, ()))
+        for key, count in shared.items():
+            similarity = count / len(query_grams)
+            if key in scores or similarity >= self.min_similarity:
+                scores[key] = scores.get(key, 0.0) + similarity
+        # Current drivers also appear in the history table, only keep the best hit per name
+        ranked = sorted(scores, key=lambda key: (-scores[key], key[0] != "current", self.entries[key].name))
+        results, seen = [], set()
+        for key in ranked:
+            entry = self.entries[key]
+            if entry.folded in seen:
+                continue
+            seen.add(entry.folded)
+            results.append({
+                "source": entry.source, "id": entry.id, "name": entry.name,
+                "nationality": entry.nationality, "score": round(scores[key], 3),
+            })
+            if len(results) == limit:
+                break
+        return results
+
+    def is_current_driver(self, driver_id: str) -> bool:
+        return ("current", driver_id) in self.entries
+
+    async def load(self):
+        async with async_engine.connect() as conn:
+            history = (await conn.execute(select(
+                models.Drivers.id, models.Drivers.driver_name, models.Drivers.nationality
+            ))).all()
+            current = (await conn.execute(select(
+                models.Current_Drivers.id, models.Current_Drivers.full_name, models.Current_Drivers.nationality
+            ))).all()
+        self.entries, self.prefixes, self.grams = {}, {}, {}
+        for row in history:
+            self.add("history", *row)
+        for row in current:
+            self.add("current", *row)
+        self.loaded = True
+
+    async def ready(self):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.load()
+
+    def warm(self):
+        """Start loading in the background if needed, never waits on the DB"""
+        if self._warming is None or self._warming.done():
+            self._warming = asyncio.create_task(self._warm())
+
+    async def _warm(self):
+        try:
+            await self.ready()
+        except Exception:
+            # The next search or warm() retries
+            logger.warning("Could not load the driver search index", exc_info=True)
+
+    def _on_changes(self, data: str):
+        for source, id, name, nationality in json.loads(data):
+            self.add(source, id, name, nationality)
+
+    async def _reload(self, client):
+        # Runs inside the pub/sub listener, which must not wait on the DB. Until the
+        # reload finishes the old entries keep serving, searches wait for it.
+        self.loaded = False
+        self.warm()
+
+async def publish_search_changes(changes: list):
+    """Called by the scraper after committing, changes are (source, id, name, nationality) rows"""
+    if not changes:
+        return
+    # Applied here too so this worker is current even if pub/sub is down
+    for change in changes:
+        search_index.add(*change)
+    try:
+        await redis_client.publish(SEARCH_CHANNEL, json.dumps(changes, default=str))
+    except Exception:
+        logger.warning("Could not publish driver search changes", exc_info=True)
+
+search_index = DriverSearchIndex(settings.search_min_similarity)
@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from app.config import settings
+
+
+@dataclass
+class Snapshot():
+    source: str
+    url: str
+    content: bytes
+    digest: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def json(self):
+        return json.loads(self.content)
+
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+
+class SnapshotStore():
+    """Raw upstream payloads, gzip-compressed on disk and keyed by content hash.
+
+    objects/<sha256>.gz holds the bodies and index.json maps each source to the
+    last snapshot that was successfully applied, along with the validators to
+    send on the next conditional request. Stored objects double as offline
+    replay fixtures.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.json")
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_atomic(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def latest(self, source: str) -> Optional[dict]:
+        return self._read_index().get(source)
+
+    def load_digest(self, digest: str) -> bytes:
+        with gzip.open(os.path.join(self.objects, f"{digest}.gz"), "rb") as f:
+            return f.read()
+
+    def load(self, source: str) -> Optional[Snapshot]:
+        entry = self.latest(source)
+        if entry is None:
+            return None
+        return Snapshot(
+            source=source,
+            url=entry["url"],
+            content=self.load_digest(entry["digest"]),
+            digest=entry["digest"],
+            etag=entry.get("etag"),
+            last_modified=entry.get("last_modified"),
+        )
+
+    def record(self, snapshot: Snapshot):
+        """Store the payload and make it the baseline for the next conditional request.
+
+        Callers do this only once the payload has been applied, so a failed DB
+        write is retried on the next run instead of being skipped as unchanged.
+        """
+        path = os.path.join(self.objects, f"{snapshot.digest}.gz")
+        if not os.path.exists(path):
+            self._write_atomic(path, gzip.compress(snapshot.content))
+        index = self._read_index()
+        index[snapshot.source] = {
+            "url": snapshot.url,
+            "digest": snapshot.digest,
+            "etag": snapshot.etag,
+            "last_modified": snapshot.last_modified,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._write_atomic(self.index_path, json.dumps(index, indent=2).encode())
+
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+snapshot_store = SnapshotStore(settings.snapshot_dir)
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, MetaData, Numeric, String, Table, text
+from sqlmodel import Session
+
+# Materialized views over Drivers, see alembic revision 7d3e9a4c1b58. Kept out of
+# SQLModel.metadata so autogenerate doesn't try to create them as tables.
+metadata = MetaData()
+
+wins_by_nationality = Table(
+    "stats_wins_by_nationality", metadata,
+    Column("nationality", String, primary_key=True),
+    Column("drivers", Integer),
+    Column("race_wins", Integer),
+    Column("podiums", Integer),
+    Column("pole_positions", Integer),
+    Column("championships", Integer),
+)
+
+championships_by_decade = Table(
+    "stats_championships_by_decade", metadata,
+    Column("decade", Integer, primary_key=True),
+    Column("championships", Integer),
+    Column("champions", Integer),
+)
+
+pole_to_win = Table(
+    "stats_pole_to_win", metadata,
+    Column("driver_id", Integer, primary_key=True),
+    Column("driver_name", String),
+    Column("nationality", String),
+    Column("pole_positions", Integer),
+    Column("race_wins", Integer),
+    Column("ratio", Numeric),
+)
+
+def refresh_driver_stats(db: Session):
+    """Called by the scraper once new driver rows are committed.
+
+    CONCURRENTLY keeps the views readable during the refresh, at the cost of a
+    diff against the old contents, which is cheap at this size.
+    """
+    for view in metadata.tables:
+        db.exec(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+    db.commit()
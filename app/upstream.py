@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import random
+import httpx
+from typing import Optional
+from app.config import settings
+from app.snapshots import Snapshot, content_digest, snapshot_store
+
+logger = logging.getLogger(__name__)
+
+# Worth retrying, anything else in 4xx is our fault and won't get better
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamClient():
+    """Shared HTTP client for the scraper's upstream sources.
+
+    Keeps one pooled connection set per host, bounds how many requests are in
+    flight at once and retries transport errors and 429/5xx responses with
+    exponential backoff and jitter.
+    """
+
+    def __init__(self, timeout: float, retries: int, backoff: float, max_concurrency: int):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                ),
+                headers={"User-Agent": "f1-platform/1.0"},
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def get(self, url: str, headers: dict = None) -> httpx.Response:
+        client = self._get_client()
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await client.get(url, headers=headers)
+                if response.status_code not in RETRY_STATUSES:
+                    # 304 answers a conditional request, it's not an error
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                    return response
+                error = httpx.HTTPStatusError(
+                    f"{response.status_code} from {url}", request=response.request, response=response
+                )
+            except httpx.TransportError as e:
+                error = e
+            if attempt == self.retries:
+                raise error
+            delay = self.backoff * 2 ** attempt + random.uniform(0, self.backoff)
+            logger.warning("GET %s failed (%r), retrying in %.1fs", url, error, delay)
+            await asyncio.sleep(delay)
+
+    async def get_json(self, url: str):
+        return (await self.get(url)).json()
+
+    async def get_text(self, url: str) -> str:
+        return (await self.get(url)).text
+
+    async def fetch_snapshot(self, source: str, url: str) -> Optional[Snapshot]:
+        """Conditional GET against the last recorded snapshot of `source`.
+
+        Returns None when nothing changed, either because the server answered
+        304 or because the body hashes to the recorded digest. In replay mode the
+        recorded snapshot is returned without touching the network.
+        """
+        if settings.upstream_replay:
+            return snapshot_store.load(source)
+        previous = snapshot_store.latest(source) or {}
+        headers = {}
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+        response = await self.get(url, headers=headers)
+        if response.status_code == 304:
+            return None
+        digest = content_digest(response.content)
+        if digest == previous.get("digest"):
+            return None
+        return Snapshot(
+            source=source,
+            url=url,
+            content=response.content,
+            digest=digest,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+upstream = UpstreamClient(
+    timeout=settings.upstream_timeout,
+    retries=settings.upstream_retries,
+    backoff=settings.upstream_backoff,
+    max_concurrency=settings.upstream_max_concurrency,
+)
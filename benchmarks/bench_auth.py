@@ -0,0 +1,44 @@
+"""Per-request auth overhead of verify_access_token with and without the claims cache.
+
+Run from the repo root: python -m benchmarks.bench_auth [requests]
+Redis is not needed: the revocation filter is primed empty and the user's
+token epoch is primed locally, so no check leaves the process.
+"""
+import asyncio
+import sys
+import time
+
+from benchmarks import env  # noqa: F401
+
+from fastapi import HTTPException
+
+from app import oauth2, pubsub
+from app.revocation import BloomFilter, revocation_filter, token_epochs
+
+
+async def per_request(requests: int, token: str, cached: bool) -> float:
+    credentials_exception = HTTPException(status_code=401)
+    oauth2.claims_cache.clear()
+    started = time.perf_counter()
+    for _ in range(requests):
+        if not cached:
+            oauth2.claims_cache.clear()
+        await oauth2.verify_access_token(token, credentials_exception)
+    return (time.perf_counter() - started) / requests
+
+
+async def main(requests: int):
+    pubsub.connected = True
+    revocation_filter._filter = BloomFilter(revocation_filter.capacity, revocation_filter.error_rate)
+    token_epochs.set(42, 0)
+    token = await oauth2.create_access_token({"user_id": 42})
+    return await per_request(requests, token, cached=False), await per_request(requests, token, cached=True)
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    uncached, cached = asyncio.run(main(requests))
+    print(f"requests:  {requests}")
+    print(f"no cache:  {uncached * 1e6:.1f} us/request")
+    print(f"cache:     {cached * 1e6:.1f} us/request")
+    print(f"speedup:   {uncached / cached:.1f}x")
@@ -0,0 +1,77 @@
+"""Compare the row-by-row driver cleaning with app.cleaning on a synthetic table.
+
+Run from the repo root: python -m benchmarks.bench_cleaning [rows]
+"""
+import re
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from app.cleaning import DRIVER_COLUMN_MAP, clean_drivers_frame
+
+
+def legacy_clean(df):
+    """The cleaning previously inlined in scraper.fetch_and_insert_new_drivers"""
+    df.columns = df.columns.str.strip()
+    df.rename(columns=DRIVER_COLUMN_MAP, inplace=True)
+    remove_alphabets = [
+        "race_entries", "race_starts", "pole_positions",
+        "race_wins", "podiums", "fastest_laps"
+    ]
+    for field in remove_alphabets:
+        df[field] = df[field].astype(str).str.replace(r'[^0-9]', '', regex=True).replace('', '0')
+    for field in remove_alphabets:
+        df[field] = df[field].astype(str).str.replace(",", "").astype(int)
+    def parse_decimal(value):
+        try:
+            return Decimal(str(value).replace(",", "").strip())
+        except:
+            return Decimal(0)
+    df["points"] = df["points"].apply(parse_decimal)
+    def clean_name(name):
+        name = str(name).strip()
+        name = re.sub(r"[^ \-\wÀ-ÖØ-öø-ÿĀ-žḀ-ỿ]", "", name, flags=re.UNICODE)
+        return name
+    df["driver_name"] = df["driver_name"].apply(clean_name)
+    return df
+
+
+def synthetic_table(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    names = np.array(["Lewis Hamilton^", "Kimi Räikkönen*", "Sergio Pérez~", "Nico Hülkenberg", "Juan Manuel Fangio†"])
+    counts = rng.integers(0, 400, size=rows).astype(str)
+    footnoted = np.char.add(counts, np.where(rng.random(rows) < 0.1, "[b]", ""))
+    points = np.char.add(np.char.mod("%.1f", rng.random(rows) * 5000), np.where(rng.random(rows) < 0.05, " (12.5)", ""))
+    return pd.DataFrame({
+        "Driver name ": names[rng.integers(0, len(names), size=rows)],
+        "Nationality": "United Kingdom",
+        "Seasons competed": "2007–2025",
+        "Drivers' Championships": "0",
+        "Race entries": footnoted,
+        "Race starts": counts,
+        "Pole positions": counts,
+        "Race wins": counts,
+        "Podiums": counts,
+        "Fastest laps": counts,
+        "Points[a]": points,
+    })
+
+
+def timed(fn, df):
+    started = time.perf_counter()
+    fn(df.copy())
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = synthetic_table(rows)
+    legacy = timed(legacy_clean, df)
+    vectorized = timed(clean_drivers_frame, df)
+    print(f"rows:       {rows}")
+    print(f"legacy:     {legacy:.3f}s")
+    print(f"vectorized: {vectorized:.3f}s")
+    print(f"speedup:    {legacy / vectorized:.1f}x")
@@ -0,0 +1,78 @@
+"""Compare insert/update throughput on the drivers table with the old and new index sets.
+
+Needs a reachable Postgres (the DATABASE_* settings). Everything happens in
+temporary tables, nothing is written to the real schema.
+
+Run from the repo root: python -m benchmarks.bench_index_writes [rows]
+"""
+import sys
+import time
+
+from sqlalchemy import text
+
+from app.database import engine
+
+STAT_COLUMNS = [
+    "race_entries", "race_starts", "pole_positions",
+    "race_wins", "podiums", "fastest_laps"
+]
+# Indexes on drivers before revision c4e8b1f02d6a
+OLD_INDEXES = [
+    "driver_name", "nationality", "seasons", "drivers_championships", *STAT_COLUMNS, "points"
+]
+
+CREATE_TABLE = """
+CREATE TEMPORARY TABLE {table} (
+    id serial PRIMARY KEY,
+    driver_name varchar NOT NULL,
+    nationality varchar NOT NULL,
+    seasons varchar NOT NULL,
+    drivers_championships varchar,
+    race_entries integer, race_starts integer, pole_positions integer,
+    race_wins integer, podiums integer, fastest_laps integer,
+    points numeric,
+    UNIQUE (driver_name, nationality)
+)
+"""
+
+INSERT = """
+INSERT INTO {table} (driver_name, nationality, seasons, drivers_championships,
+    race_entries, race_starts, pole_positions, race_wins, podiums, fastest_laps, points)
+SELECT 'Driver ' || n, 'Nation ' || (n % 40), '1950-' || (1950 + n % 75), (n % 8)::text,
+    n % 400, n % 390, n % 100, n % 105, n % 200, n % 80, (n % 5000) * 1.5
+FROM generate_series(1, :rows) AS n
+"""
+
+UPDATE = """
+UPDATE {table} SET race_entries = race_entries + 1, race_starts = race_starts + 1,
+    podiums = podiums + 1, points = points + 25
+"""
+
+
+def timed(conn, sql, **params):
+    started = time.perf_counter()
+    conn.execute(text(sql), params)
+    return time.perf_counter() - started
+
+
+def run(table, indexes, rows):
+    with engine.begin() as conn:
+        conn.execute(text(CREATE_TABLE.format(table=table)))
+        for column in indexes:
+            conn.execute(text(f"CREATE INDEX ON {table} ({column})"))
+        insert = timed(conn, INSERT.format(table=table), rows=rows)
+        update = timed(conn, UPDATE.format(table=table))
+    return insert, update
+
+
+def main(rows):
+    for label, table, indexes in (
+        ("old indexes", "bench_drivers_old", OLD_INDEXES),
+        ("new indexes", "bench_drivers_new", []),
+    ):
+        insert, update = run(table, indexes, rows)
+        print(f"{label:12} insert {rows / insert:10.0f} rows/s   update {rows / update:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
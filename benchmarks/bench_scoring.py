@@ -0,0 +1,92 @@
+"""Compare scoring one round of predictions row by row with app.scoring.score_predictions.
+
+Each side gets the rows its query returns: driver id strings for the row by row
+loop, picks already encoded by Postgres (array_position) for the vectorized
+engine. The vectorized side also builds the parameters of the bulk write,
+everything short of the DB round trip.
+
+Run from the repo root: python -m benchmarks.bench_scoring [predictions]
+"""
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import chain
+
+import numpy as np
+
+from benchmarks import env  # noqa: F401
+
+from app.scoring import (
+    EXACT_PODIUM_POINTS, FASTEST_LAP_POINTS, PODIUM_WRONG_PLACE_POINTS, POLE_POINTS,
+    RaceResult, result_codes, score_predictions,
+)
+
+DRIVERS = np.array([f"driver_{i}" for i in range(20)], dtype=object)
+RESULT = RaceResult(("driver_0", "driver_1", "driver_2"), "driver_1", "driver_3", datetime(2025, 3, 16, 4, tzinfo=timezone.utc))
+
+
+def synthetic_predictions(n: int):
+    rng = np.random.default_rng(42)
+    # Weighted towards the front runners so every scoring branch is exercised
+    weights = np.linspace(3, 1, len(DRIVERS))
+    weights /= weights.sum()
+    picks = DRIVERS[rng.choice(len(DRIVERS), size=(n, 5), p=weights)]
+    return list(zip(range(1, n + 1), rng.integers(1, n, size=n).tolist(), *picks.T, [0] * n))
+
+
+def legacy_score(rows):
+    """Per-row scoring, what an ORM loop over Predictions objects would do"""
+    points = []
+    for _, _, p1, p2, p3, pole, fastest_lap, _ in rows:
+        total = 0
+        for place, driver in enumerate((p1, p2, p3)):
+            if RESULT.podium[place] == driver:
+                total += EXACT_PODIUM_POINTS
+            elif driver in RESULT.podium:
+                total += PODIUM_WRONG_PLACE_POINTS
+        total += POLE_POINTS if pole == RESULT.pole else 0
+        total += FASTEST_LAP_POINTS if fastest_lap == RESULT.fastest_lap else 0
+        points.append(total)
+    return points
+
+
+def encoded(rows):
+    """What the scoring query returns: id, user_id, points, then the coded picks"""
+    vocabulary, _ = result_codes(RESULT)
+    codes = {driver: code for code, driver in enumerate(vocabulary, 1)}
+    return [(id, user_id, points, *[codes.get(pick, 0) for pick in picks]) for id, user_id, *picks, points in rows]
+
+
+def vectorized_score(rows):
+    _, actual = result_codes(RESULT)
+    chunk = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * 8).reshape(-1, 8)
+    points = score_predictions(chunk[:, 3:], actual)
+    deltas = points - chunk[:, 2]
+    return {
+        "ids": chunk[:, 0].tolist(), "user_ids": chunk[:, 1].tolist(),
+        "points": points.tolist(), "deltas": deltas.tolist(),
+    }
+
+
+def timed(fn, rows):
+    started = time.perf_counter()
+    result = fn(rows)
+    return time.perf_counter() - started, result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = synthetic_predictions(n)
+    legacy, expected = timed(legacy_score, rows)
+    rows = encoded(rows)
+    vectorized, params = timed(vectorized_score, rows)
+    assert params["points"] == expected
+    # Scoring alone, without turning the rows into an array and back
+    chunk = np.array(rows, dtype=np.int64)
+    _, actual = result_codes(RESULT)
+    scoring, _ = timed(lambda picks: score_predictions(picks, actual), chunk[:, 3:])
+    print(f"predictions:   {n}")
+    print(f"row by row:    {legacy:.3f}s")
+    print(f"vectorized:    {vectorized:.3f}s (incl. array conversion and bulk write parameters)")
+    print(f"scoring only:  {scoring:.3f}s")
+    print(f"speedup:       {legacy / vectorized:.1f}x end to end, {legacy / scoring:.1f}x scoring")
@@ -0,0 +1,13 @@
+"""Placeholder settings so app.config loads without a .env, real environment values win.
+
+Import before anything from app: from benchmarks import env  # noqa: F401
+"""
+import os
+
+for name, value in {
+    "DATABASE_HOSTNAME": "localhost", "DATABASE_PORT": "5432", "DATABASE_PASSWORD": "bench",
+    "DATABASE_NAME": "bench", "DATABASE_USERNAME": "bench", "SECRET_KEY": "bench-secret",
+    "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REDIS_HOST": "localhost", "REDIS_PORT": "6379", "REDIS_DB": "0",
+}.items():
+    os.environ.setdefault(name, value)
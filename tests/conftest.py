@@ -0,0 +1,10 @@
+import os
+
+# Placeholder settings so app.config loads without a .env, nothing here connects
+for name, value in {
+    "DATABASE_HOSTNAME": "localhost", "DATABASE_PORT": "5432", "DATABASE_PASSWORD": "test",
+    "DATABASE_NAME": "test", "DATABASE_USERNAME": "test", "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REDIS_HOST": "localhost", "REDIS_PORT": "6379", "REDIS_DB": "0",
+}.items():
+    os.environ.setdefault(name, value)
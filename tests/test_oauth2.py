@@ -0,0 +1,31 @@
+import asyncio
+
+from jose import jwt
+from redis.exceptions import ConnectionError
+
+from app import oauth2, pubsub
+from app.revocation import token_epochs
+
+
+class UnreachableRedis():
+    async def get(self, key):
+        raise ConnectionError("Redis is down")
+
+
+def issue_token(monkeypatch, user_id: int) -> dict:
+    monkeypatch.setattr(oauth2, "redis_client", UnreachableRedis())
+    monkeypatch.setattr(pubsub, "connected", False)
+    token = asyncio.run(oauth2.create_access_token({"user_id": user_id}))
+    return jwt.decode(token, oauth2.SECRET_KEY, algorithms=[oauth2.ALGORITHM])
+
+
+def test_login_token_without_redis(monkeypatch):
+    assert issue_token(monkeypatch, 1)["epoch"] == 0
+
+
+def test_login_token_without_redis_uses_last_known_epoch(monkeypatch):
+    token_epochs.set(2, 3)
+    try:
+        assert issue_token(monkeypatch, 2)["epoch"] == 3
+    finally:
+        token_epochs._epochs.pop(2, None)
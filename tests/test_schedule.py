@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from app import schedule
+
+RACES = {"MRData": {"RaceTable": {"Races": [{"round": "1", "date": "2025-03-16", "time": "04:00:00Z"}]}}}
+
+
+class FakeRedis():
+    def __init__(self):
+        self.values = {}
+        self.down = False
+
+    async def get(self, key):
+        if self.down:
+            raise ConnectionError("Redis is down")
+        return self.values.get(key)
+
+    async def set(self, key, value):
+        self.values[key] = value
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(schedule, "redis_client", fake)
+    return fake
+
+
+def test_lookups_never_wait_on_upstream(monkeypatch, redis):
+    fetched = []
+
+    async def get_json(url):
+        fetched.append(url)
+        return RACES
+
+    monkeypatch.setattr(schedule.upstream, "get_json", get_json)
+    races = schedule.RaceSchedule(ttl=60)
+
+    async def lookups():
+        with pytest.raises(schedule.ScheduleUnavailable):
+            await races.race_start(2025, 1)
+        assert fetched == []
+        # The miss started a refresh in the background
+        await asyncio.sleep(0)
+        return await races.race_start(2025, 1)
+
+    assert asyncio.run(lookups()).isoformat() == "2025-03-16T04:00:00+00:00"
+    assert len(fetched) == 1
+
+
+def test_last_known_schedule_is_served_when_refresh_fails(monkeypatch, redis):
+    async def get_json(url):
+        raise ConnectionError("upstream is down")
+
+    monkeypatch.setattr(schedule.upstream, "get_json", get_json)
+    races = schedule.RaceSchedule(ttl=60)
+    races._seasons[2025] = (time.monotonic() - 1, {1: schedule.race_start(RACES["MRData"]["RaceTable"]["Races"][0])})
+    redis.down = True
+
+    async def lookups():
+        await races._refresh_quietly(2025)
+        return await races.race_start(2025, 1)
+
+    assert asyncio.run(lookups()).isoformat() == "2025-03-16T04:00:00+00:00"
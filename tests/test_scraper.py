@@ -0,0 +1,54 @@
+import asyncio
+
+from app import scraper
+
+
+class FakeSnapshot():
+    def __init__(self, source: str, payload: dict):
+        self.source = source
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+STANDINGS = {
+    "driver_standings": {"MRData": {"StandingsTable": {"StandingsLists": [{"round": "5", "DriverStandings": []}]}}},
+    "constructor_standings": {"MRData": {"StandingsTable": {"StandingsLists": [{"round": "5", "ConstructorStandings": []}]}}},
+}
+
+
+def test_failed_scoring_is_retried_on_the_next_refresh(monkeypatch):
+    recorded = set()
+    scored = []
+
+    async def fetch_snapshot(source, url):
+        # Like a 304: nothing is returned once the snapshot was recorded
+        return None if source in recorded else FakeSnapshot(source, STANDINGS[source])
+
+    async def score_completed_round(season, round_):
+        if not scored:
+            scored.append(None)
+            raise RuntimeError("results not published")
+        scored.append((season, round_))
+
+    async def noop(*args):
+        pass
+
+    monkeypatch.setattr(scraper.upstream, "fetch_snapshot", fetch_snapshot)
+    monkeypatch.setattr(scraper, "update_current_season_sync", lambda drivers, constructors: [])
+    monkeypatch.setattr(scraper, "bump_standings_version", noop)
+    monkeypatch.setattr(scraper, "publish_search_changes", noop)
+    monkeypatch.setattr(scraper, "score_completed_round", score_completed_round)
+    monkeypatch.setattr(scraper.snapshot_store, "record", lambda snapshot: recorded.add(snapshot.source))
+
+    asyncio.run(scraper.refresh_current_season())
+    assert recorded == {"constructor_standings"}
+
+    asyncio.run(scraper.refresh_current_season())
+    assert scored[-1] == (scraper.current, 5)
+    assert recorded == {"driver_standings", "constructor_standings"}
+
+    # Nothing changed and the round is scored, the next refresh is a no-op
+    asyncio.run(scraper.refresh_current_season())
+    assert len(scored) == 2